@@ -1,25 +1,68 @@
 import os
 import logging
+import threading
+import time
 
 from dotenv import load_dotenv
 
 logger = logging.getLogger(__name__)
 
+# Seconds a loaded configuration is reused before the environment is read again
+CONFIG_CACHE_TTL_SECONDS = 60
+
+_config_cache = None
+_config_loaded_at = 0.0
+_config_lock = threading.Lock()
+
+
+def invalidate_config_cache():
+    """Drop the cached configuration so the next get_config() call re-reads the environment."""
+    global _config_cache
+    with _config_lock:
+        _config_cache = None
+
+
 def get_config(cosmos_config_container=None):
     """
     Get configuration from environment variables only.
     
+    The configuration is cached for CONFIG_CACHE_TTL_SECONDS, so per-document callers
+    do not re-read the .env file on every call. Call invalidate_config_cache() after
+    changing the environment at runtime.
+    
     Note: cosmos_config_container parameter is kept for backwards compatibility 
     but is ignored. Configuration is now sourced exclusively from environment variables.
     """
+    global _config_cache, _config_loaded_at
+    with _config_lock:
+        if _config_cache is None or time.monotonic() - _config_loaded_at > CONFIG_CACHE_TTL_SECONDS:
+            _config_cache = _load_config()
+            _config_loaded_at = time.monotonic()
+        # Copy so callers cannot modify the cached configuration
+        return dict(_config_cache)
+
+
+def _get_positive_int(name, default):
+    """Read an integer setting from the environment that must be at least 1."""
+    value = int(os.getenv(name, default))
+    if value < 1:
+        raise ValueError(f"{name} must be at least 1, got {value}")
+    return value
+
+
+def _load_config():
+    """Load configuration from the environment (and .env file, if present)."""
     load_dotenv()
     
     # Configuration from environment variables only
     config = {
         "doc_intelligence_endpoint": os.getenv("DOCUMENT_INTELLIGENCE_ENDPOINT", None),
+        "doc_intelligence_max_concurrency": _get_positive_int("DOC_INTELLIGENCE_MAX_CONCURRENCY", "8"),
         "mistral_doc_ai_endpoint": os.getenv("MISTRAL_DOC_AI_ENDPOINT", None),
         "mistral_doc_ai_key": os.getenv("MISTRAL_DOC_AI_KEY", None),
         "mistral_doc_ai_model": os.getenv("MISTRAL_DOC_AI_MODEL", "mistral-document-ai-2505"),
+        "mistral_doc_ai_multipart_upload": os.getenv("MISTRAL_DOC_AI_MULTIPART_UPLOAD", "false").lower() == "true",
+        "ocr_batch_concurrency": _get_positive_int("OCR_BATCH_CONCURRENCY", "3"),
         "openai_api_key": os.getenv("AZURE_OPENAI_KEY", None),
         "openai_api_endpoint": os.getenv("AZURE_OPENAI_ENDPOINT", None),
         "openai_api_version": "2024-12-01-preview",
@@ -1,223 +1,376 @@
+import asyncio
+import contextlib
+import functools
 import json
-import pandas as pd
-from typing import Optional, List, Dict, Any, Union
+import logging
+import threading
+import weakref
+import aiofiles
+from typing import Optional, List, Dict, Any, Tuple, Union
 from azure.identity import DefaultAzureCredential
+from azure.identity.aio import DefaultAzureCredential as AsyncDefaultAzureCredential
 from azure.ai.documentintelligence import DocumentIntelligenceClient
+from azure.ai.documentintelligence.aio import DocumentIntelligenceClient as AsyncDocumentIntelligenceClient
 from azure.ai.documentintelligence.models import DocumentAnalysisFeature
 from ai_ocr.azure.config import get_config
 
+logger = logging.getLogger(__name__)
 
-def get_document_intelligence_client(cosmos_config_container=None):
-    """Create a new Document Intelligence client instance for each request to avoid connection pooling issues"""
-    config = get_config(cosmos_config_container)
+# Process-wide cap on analyze calls in flight, shared by the sync and async paths across
+# all threads and event loops. Sized from DOC_INTELLIGENCE_MAX_CONCURRENCY on first use,
+# which should be kept at or below the Document Intelligence TPS limit of the resource.
+_analyze_slots: Optional[threading.BoundedSemaphore] = None
+_analyze_slots_lock = threading.Lock()
+
+# Interval at which async callers re-check for a free analyze slot
+_ANALYZE_SLOT_POLL_SECONDS = 0.05
+
+# Async clients are bound to the event loop that created them, so one is kept per
+# loop. The aiohttp transport of a client shares its connection pool across all
+# requests issued on that loop.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, tuple]" = weakref.WeakKeyDictionary()
+
+# Decimal places polygon points are rounded to. Coordinates are in inches (PDF) or
+# pixels (images), so 3 decimals is well below what is needed to draw a bounding box
+# while keeping the serialized polygon data compact.
+DEFAULT_POLYGON_PRECISION = 3
+
+# The polygon extractors below read elements through their mapping interface using the
+# service's JSON field names (e.g. element.get("pageNumber")). SDK models are mutable
+# mappings over the raw response, and reading them this way skips the per-attribute
+# deserialization of the typed properties, which dominated extraction time for large
+# documents. Plain dicts (e.g. from AnalyzeResult.as_dict()) work the same way.
+
+
+@functools.lru_cache(maxsize=4)
+def _get_cached_client(endpoint: str) -> DocumentIntelligenceClient:
+    """Create the Document Intelligence client for an endpoint once and reuse it"""
     return DocumentIntelligenceClient(
-        endpoint=config["doc_intelligence_endpoint"],
+        endpoint=endpoint,
         credential=DefaultAzureCredential(),
         headers={"solution":"ARGUS-1.0"}
     )
 
 
-def extract_polygon_from_bounding_regions(bounding_regions: List[Any]) -> List[Dict[str, Any]]:
+def get_document_intelligence_client(cosmos_config_container=None):
     """
-    Extract polygon data from Document Intelligence bounding regions.
+    Get the shared Document Intelligence client for the configured endpoint.
     
-    Args:
-        bounding_regions: List of bounding region objects from Document Intelligence
-        
-    Returns:
-        List of polygon dictionaries with points and page number
+    The client is thread-safe; sharing it across requests reuses its HTTPS connection
+    pool and the credential's token cache instead of re-authenticating per document.
     """
-    polygons = []
-    if not bounding_regions:
-        return polygons
+    config = get_config(cosmos_config_container)
+    return _get_cached_client(config["doc_intelligence_endpoint"])
+
+
+def get_async_document_intelligence_client(cosmos_config_container=None) -> AsyncDocumentIntelligenceClient:
+    """
+    Get the async Document Intelligence client for the running event loop, creating it on first use.
     
-    for region in bounding_regions:
-        polygon_data = {
-            "pageNumber": getattr(region, 'page_number', 1),
-            "points": list(getattr(region, 'polygon', [])) if hasattr(region, 'polygon') else []
-        }
-        polygons.append(polygon_data)
+    The client stays open until close_async_document_intelligence_client() is awaited on the
+    same loop; prefer async_document_intelligence_session(), which does that on exit.
+    """
+    loop = asyncio.get_running_loop()
+    entry = _async_clients.get(loop)
+    if entry is None:
+        config = get_config(cosmos_config_container)
+        credential = AsyncDefaultAzureCredential()
+        client = AsyncDocumentIntelligenceClient(
+            endpoint=config["doc_intelligence_endpoint"],
+            credential=credential,
+            headers={"solution":"ARGUS-1.0"}
+        )
+        entry = _async_clients[loop] = (client, credential)
+    return entry[0]
+
+
+async def close_async_document_intelligence_client() -> None:
+    """Close the async Document Intelligence client of the running event loop, if any"""
+    entry = _async_clients.pop(asyncio.get_running_loop(), None)
+    if entry is not None:
+        client, credential = entry
+        await client.close()
+        await credential.close()
+
+
+@contextlib.asynccontextmanager
+async def async_document_intelligence_session(cosmos_config_container=None):
+    """
+    Provide the async Document Intelligence client of the running event loop and close it on exit.
+    
+    Wrap all get_ocr_results_async calls of an event loop that ends with the work (e.g. one
+    started with asyncio.run) in this block, so the aiohttp session and the credential are
+    not leaked when the loop closes:
+    
+        async with async_document_intelligence_session():
+            results = await asyncio.gather(*(get_ocr_results_async(path) for path in paths))
+    """
+    try:
+        yield get_async_document_intelligence_client(cosmos_config_container)
+    finally:
+        await close_async_document_intelligence_client()
+
+
+def _get_analyze_slots(cosmos_config_container=None) -> threading.BoundedSemaphore:
+    """Get the process-wide semaphore bounding concurrent analyze calls, creating it on first use"""
+    global _analyze_slots
+    with _analyze_slots_lock:
+        if _analyze_slots is None:
+            config = get_config(cosmos_config_container)
+            _analyze_slots = threading.BoundedSemaphore(config["doc_intelligence_max_concurrency"])
+        return _analyze_slots
+
+
+@contextlib.asynccontextmanager
+async def _async_analyze_slot(cosmos_config_container=None):
+    """Hold one of the process-wide analyze slots without blocking the event loop"""
+    slots = _get_analyze_slots(cosmos_config_container)
+    # Poll rather than block, so other tasks on this loop keep running while all slots are taken
+    while not slots.acquire(blocking=False):
+        await asyncio.sleep(_ANALYZE_SLOT_POLL_SECONDS)
+    try:
+        yield
+    finally:
+        slots.release()
+
+
+def _round_points(polygon: Optional[List[float]], precision: Optional[int]) -> List[float]:
+    """
+    Copy polygon points into a list of floats, rounded to the given number of decimal places.
     
-    return polygons
+    Points read through the mapping interface are raw JSON numbers, so whole-number
+    coordinates (common for images in pixel units) arrive as int and are converted here.
+    """
+    if not polygon:
+        return []
+    if precision is None:
+        return [float(point) for point in polygon]
+    return [round(float(point), precision) for point in polygon]
 
 
-def extract_words_with_polygons(pages: List[Any]) -> List[Dict[str, Any]]:
+def extract_polygon_from_bounding_regions(bounding_regions: List[Any], precision: Optional[int] = None) -> List[Dict[str, Any]]:
     """
-    Extract all words with their bounding polygons from Document Intelligence pages.
+    Extract polygon data from Document Intelligence bounding regions.
     
     Args:
-        pages: List of page objects from Document Intelligence result
+        bounding_regions: List of bounding region objects from Document Intelligence
+        precision: Decimal places to round polygon points to, or None for full precision
         
     Returns:
-        List of word dictionaries with content, polygon, and page number
+        List of polygon dictionaries with points and page number
     """
-    words_data = []
-    if not pages:
-        return words_data
-    
-    for page in pages:
-        page_number = getattr(page, 'page_number', 1)
-        words = getattr(page, 'words', []) or []
-        
-        for word in words:
-            word_data = {
-                "content": getattr(word, 'content', ''),
-                "confidence": getattr(word, 'confidence', None),
-                "pageNumber": page_number,
-                "points": list(getattr(word, 'polygon', [])) if hasattr(word, 'polygon') else []
-            }
-            words_data.append(word_data)
-    
-    return words_data
+    return [
+        {
+            "pageNumber": region.get("pageNumber") or 1,
+            "points": _round_points(region.get("polygon"), precision)
+        }
+        for region in bounding_regions or ()
+    ]
 
 
-def extract_lines_with_polygons(pages: List[Any]) -> List[Dict[str, Any]]:
+def extract_words_and_lines_with_polygons(pages: List[Any], precision: Optional[int] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
     """
-    Extract all lines with their bounding polygons from Document Intelligence pages.
+    Extract all words and lines with their bounding polygons from Document Intelligence pages.
+    
+    Both lists are built in a single pass over the pages.
     
     Args:
         pages: List of page objects from Document Intelligence result
+        precision: Decimal places to round polygon points to, or None for full precision
         
     Returns:
-        List of line dictionaries with content, polygon, and page number
+        Tuple of (words, lines) where each entry is a dictionary with content, polygon,
+        and page number (words also carry their confidence)
     """
+    words_data = []
     lines_data = []
-    if not pages:
-        return lines_data
+    append_word = words_data.append
+    append_line = lines_data.append
     
-    for page in pages:
-        page_number = getattr(page, 'page_number', 1)
-        lines = getattr(page, 'lines', []) or []
+    for page in pages or ():
+        page_number = page.get("pageNumber") or 1
         
-        for line in lines:
-            line_data = {
-                "content": getattr(line, 'content', ''),
+        for word in page.get("words") or ():
+            append_word({
+                "content": word.get("content") or '',
+                "confidence": word.get("confidence"),
                 "pageNumber": page_number,
-                "points": list(getattr(line, 'polygon', [])) if hasattr(line, 'polygon') else []
-            }
-            lines_data.append(line_data)
+                "points": _round_points(word.get("polygon"), precision)
+            })
+        
+        for line in page.get("lines") or ():
+            append_line({
+                "content": line.get("content") or '',
+                "pageNumber": page_number,
+                "points": _round_points(line.get("polygon"), precision)
+            })
     
-    return lines_data
+    return words_data, lines_data
 
 
-def extract_key_value_pairs(key_value_pairs: List[Any]) -> List[Dict[str, Any]]:
+def _extract_key_value_element(element: Any, precision: Optional[int]) -> Dict[str, Any]:
+    """Extract content and polygons of the key or value side of a key-value pair"""
+    if not element:
+        return {"content": '', "boundingPolygons": []}
+    return {
+        "content": element.get("content") or '',
+        "boundingPolygons": extract_polygon_from_bounding_regions(element.get("boundingRegions"), precision)
+    }
+
+
+def extract_key_value_pairs(key_value_pairs: List[Any], precision: Optional[int] = None) -> List[Dict[str, Any]]:
     """
     Extract key-value pairs with their bounding polygons from Document Intelligence result.
     
     Args:
         key_value_pairs: List of key-value pair objects from Document Intelligence
+        precision: Decimal places to round polygon points to, or None for full precision
         
     Returns:
         List of key-value dictionaries with key, value, and their polygons
     """
-    kv_data = []
-    if not key_value_pairs:
-        return kv_data
-    
-    for kv_pair in key_value_pairs:
-        key_obj = getattr(kv_pair, 'key', None)
-        value_obj = getattr(kv_pair, 'value', None)
-        
-        kv_entry = {
-            "key": {
-                "content": getattr(key_obj, 'content', '') if key_obj else '',
-                "boundingPolygons": extract_polygon_from_bounding_regions(
-                    getattr(key_obj, 'bounding_regions', []) if key_obj else []
-                )
-            },
-            "value": {
-                "content": getattr(value_obj, 'content', '') if value_obj else '',
-                "boundingPolygons": extract_polygon_from_bounding_regions(
-                    getattr(value_obj, 'bounding_regions', []) if value_obj else []
-                )
-            },
-            "confidence": getattr(kv_pair, 'confidence', None)
+    return [
+        {
+            "key": _extract_key_value_element(kv_pair.get("key"), precision),
+            "value": _extract_key_value_element(kv_pair.get("value"), precision),
+            "confidence": kv_pair.get("confidence")
         }
-        kv_data.append(kv_entry)
-    
-    return kv_data
+        for kv_pair in key_value_pairs or ()
+    ]
 
 
-def extract_paragraphs_with_polygons(paragraphs: List[Any]) -> List[Dict[str, Any]]:
+def extract_paragraphs_with_polygons(paragraphs: List[Any], precision: Optional[int] = None) -> List[Dict[str, Any]]:
     """
     Extract paragraphs with their bounding polygons from Document Intelligence result.
     
     Args:
         paragraphs: List of paragraph objects from Document Intelligence
+        precision: Decimal places to round polygon points to, or None for full precision
         
     Returns:
         List of paragraph dictionaries with content and polygons
     """
-    para_data = []
-    if not paragraphs:
-        return para_data
-    
-    for paragraph in paragraphs:
-        para_entry = {
-            "content": getattr(paragraph, 'content', ''),
-            "role": getattr(paragraph, 'role', None),
-            "boundingPolygons": extract_polygon_from_bounding_regions(
-                getattr(paragraph, 'bounding_regions', [])
-            )
+    return [
+        {
+            "content": paragraph.get("content") or '',
+            "role": paragraph.get("role"),
+            "boundingPolygons": extract_polygon_from_bounding_regions(paragraph.get("boundingRegions"), precision)
         }
-        para_data.append(para_entry)
+        for paragraph in paragraphs or ()
+    ]
+
+
+def _build_ocr_output(result: Any, include_polygons: bool, precision: Optional[int] = DEFAULT_POLYGON_PRECISION, log_prefix: str = "") -> Union[str, Dict[str, Any]]:
+    """
+    Convert a Document Intelligence analyze result into the ARGUS OCR output.
+    
+    Args:
+        result: AnalyzeResult returned by the Document Intelligence poller
+        include_polygons: If True, return full result with polygon data; if False, return only text content
+        precision: Decimal places to round polygon points to, or None for full precision
+        log_prefix: Prefix for log messages (e.g. the calling thread id)
+        
+    Returns:
+        If include_polygons is False: str - OCR text content
+        If include_polygons is True: dict - Full result with content and polygon data
+    """
+    ocr_content = result.content
+    logger.info(f"{log_prefix}Document Intelligence OCR completed, {len(ocr_content)} characters")
+    
+    if not include_polygons:
+        return ocr_content
+    
+    # Extract full polygon data for correlation
+    logger.info(f"{log_prefix}Extracting polygon data from Document Intelligence result")
+    
+    words, lines = extract_words_and_lines_with_polygons(result.get("pages"), precision)
+    
+    polygon_data = {
+        "content": ocr_content,
+        "words": words,
+        "lines": lines,
+        "keyValuePairs": extract_key_value_pairs(result.get("keyValuePairs"), precision),
+        "paragraphs": extract_paragraphs_with_polygons(result.get("paragraphs"), precision)
+    }
     
-    return para_data
+    logger.info(f"{log_prefix}Extracted {len(polygon_data['words'])} words, "
+                f"{len(polygon_data['lines'])} lines, "
+                f"{len(polygon_data['keyValuePairs'])} key-value pairs, "
+                f"{len(polygon_data['paragraphs'])} paragraphs with polygons")
+    
+    return polygon_data
 
 
-def get_ocr_results(file_path: str, cosmos_config_container=None, include_polygons: bool = False) -> Union[str, Dict[str, Any]]:
+def get_ocr_results(file_path: str, cosmos_config_container=None, include_polygons: bool = False, precision: Optional[int] = DEFAULT_POLYGON_PRECISION) -> Union[str, Dict[str, Any]]:
     """
     Get OCR results from Document Intelligence.
     
+    Blocks while DOC_INTELLIGENCE_MAX_CONCURRENCY analyze calls are already in flight
+    in this process.
+    
     Args:
         file_path: Path to the document file
         cosmos_config_container: Optional Cosmos config container
         include_polygons: If True, return full result with polygon data; if False, return only text content
+        precision: Decimal places to round polygon points to, or None for full precision
         
     Returns:
         If include_polygons is False: str - OCR text content
         If include_polygons is True: dict - Full result with content and polygon data
     """
-    import threading
-    import logging
-    
     thread_id = threading.current_thread().ident
-    logger = logging.getLogger(__name__)
     
     logger.info(f"[Thread-{thread_id}] Starting Document Intelligence OCR for: {file_path}")
     logger.info(f"[Thread-{thread_id}] Include polygons: {include_polygons}")
     
-    # Create a new client instance for this request to ensure parallel processing
     client = get_document_intelligence_client(cosmos_config_container)
     
-    with open(file_path, "rb") as f:
-        logger.info(f"[Thread-{thread_id}] Submitting document to Document Intelligence API")
-        poller = client.begin_analyze_document("prebuilt-layout", body=f)
+    with _get_analyze_slots(cosmos_config_container):
+        with open(file_path, "rb") as f:
+            logger.info(f"[Thread-{thread_id}] Submitting document to Document Intelligence API")
+            poller = client.begin_analyze_document("prebuilt-layout", body=f)
 
-    logger.info(f"[Thread-{thread_id}] Waiting for Document Intelligence results...")
-    result = poller.result()
+        logger.info(f"[Thread-{thread_id}] Waiting for Document Intelligence results...")
+        result = poller.result()
     
-    ocr_content = result.content
-    logger.info(f"[Thread-{thread_id}] Document Intelligence OCR completed, {len(ocr_content)} characters")
+    return _build_ocr_output(result, include_polygons, precision, f"[Thread-{thread_id}] ")
+
+
+async def get_ocr_results_async(file_path: str, cosmos_config_container=None, include_polygons: bool = False, precision: Optional[int] = DEFAULT_POLYGON_PRECISION) -> Union[str, Dict[str, Any]]:
+    """
+    Get OCR results from Document Intelligence without blocking the event loop.
     
-    if not include_polygons:
-        return ocr_content
+    Uses the shared async client of the running event loop, so many documents can be
+    analyzed concurrently from a single worker. Analyze calls count against the same
+    process-wide limit (DOC_INTELLIGENCE_MAX_CONCURRENCY) as get_ocr_results.
     
-    # Extract full polygon data for correlation
-    logger.info(f"[Thread-{thread_id}] Extracting polygon data from Document Intelligence result")
+    The caller owns the lifecycle of the loop's client: run the calls inside
+    async_document_intelligence_session(), or await close_async_document_intelligence_client()
+    before the event loop ends.
     
-    polygon_data = {
-        "content": ocr_content,
-        "words": extract_words_with_polygons(getattr(result, 'pages', [])),
-        "lines": extract_lines_with_polygons(getattr(result, 'pages', [])),
-        "keyValuePairs": extract_key_value_pairs(getattr(result, 'key_value_pairs', [])),
-        "paragraphs": extract_paragraphs_with_polygons(getattr(result, 'paragraphs', []))
-    }
+    Args:
+        file_path: Path to the document file
+        cosmos_config_container: Optional Cosmos config container
+        include_polygons: If True, return full result with polygon data; if False, return only text content
+        precision: Decimal places to round polygon points to, or None for full precision
+        
+    Returns:
+        If include_polygons is False: str - OCR text content
+        If include_polygons is True: dict - Full result with content and polygon data
+    """
+    logger.info(f"Starting async Document Intelligence OCR for: {file_path}")
+    logger.info(f"Include polygons: {include_polygons}")
     
-    logger.info(f"[Thread-{thread_id}] Extracted {len(polygon_data['words'])} words, "
-                f"{len(polygon_data['lines'])} lines, "
-                f"{len(polygon_data['keyValuePairs'])} key-value pairs, "
-                f"{len(polygon_data['paragraphs'])} paragraphs with polygons")
+    client = get_async_document_intelligence_client(cosmos_config_container)
     
-    return polygon_data
-
+    async with _async_analyze_slot(cosmos_config_container):
+        # Read inside the semaphore so only the documents being submitted are held in memory
+        async with aiofiles.open(file_path, "rb") as f:
+            document_bytes = await f.read()
+        
+        logger.info(f"Submitting document to Document Intelligence API: {file_path}")
+        poller = await client.begin_analyze_document("prebuilt-layout", body=document_bytes)
+        logger.info(f"Waiting for Document Intelligence results: {file_path}")
+        result = await poller.result()
+    
+    return _build_ocr_output(result, include_polygons, precision)
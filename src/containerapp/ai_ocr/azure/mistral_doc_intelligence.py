@@ -2,46 +2,170 @@
 Mistral Document AI integration for OCR processing.
 Provides an alternative to Azure Document Intelligence using Mistral's Document AI API.
 """
+import atexit
 import base64
-import json
+import functools
 import logging
+import os
+import time
 import httpx
-from typing import Optional, Union
+import numpy as np
+import orjson
+from types import MappingProxyType
+from typing import Any, Callable, List, Mapping, Optional, Union
 from ai_ocr.azure.config import get_config
 
 logger = logging.getLogger(__name__)
 
+# Shared HTTP client so consecutive documents reuse keep-alive connections instead of
+# paying a TCP + TLS handshake per request. httpx.Client is safe to share across threads.
+_MISTRAL_CLIENT = httpx.Client(
+    timeout=httpx.Timeout(300.0, connect=10.0),  # 5 minute timeout for large documents
+    limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+    http2=True
+)
+atexit.register(_MISTRAL_CLIENT.close)
+
+# Read size used when streaming files into base64 (57 KiB, a multiple of 3)
+_BASE64_CHUNK_SIZE = 57 * 1024
+
+# File extension -> (MIME type, Mistral document type)
+_FILE_TYPES = {
+    '.pdf': ('application/pdf', 'document_url'),
+    '.jpg': ('image/jpeg', 'image_url'),
+    '.jpeg': ('image/jpeg', 'image_url'),
+    '.png': ('image/png', 'image_url'),
+}
+_DEFAULT_FILE_TYPE = ('application/pdf', 'document_url')
+
+# Status codes indicating that an endpoint does not accept multipart uploads. Endpoints
+# that answered with one of them get the base64 JSON payload for the rest of the process.
+_MULTIPART_UNSUPPORTED_STATUS_CODES = frozenset({404, 405, 415})
+# Status codes that may mean either "multipart not accepted" or "bad document". The
+# document is retried as base64 JSON, and the endpoint is only switched to base64 for
+# good if that retry succeeds.
+_MULTIPART_AMBIGUOUS_STATUS_CODES = frozenset({400, 422})
+_MULTIPART_REJECTED_ENDPOINTS = set()
+
+# Retries for throttled (HTTP 429) requests. The Retry-After header is honored when
+# present, otherwise the delay doubles per attempt up to the maximum.
+_MAX_THROTTLE_RETRIES = 5
+_THROTTLE_BASE_DELAY_SECONDS = 2.0
+_THROTTLE_MAX_DELAY_SECONDS = 60.0
+
+# Decimal places polygon points are rounded to, keeping the serialized polygon data compact
+DEFAULT_POLYGON_PRECISION = 3
+
 
 def encode_file_to_base64(file_path: str) -> tuple[str, str]:
     """
     Encode a file to base64 string and determine its type.
     
+    The file is encoded in chunks straight into a buffer sized for the final data URL,
+    so peak memory stays close to the size of the encoded output.
+    
     Args:
         file_path: Path to the file to encode
         
     Returns:
         Tuple of (base64_string, file_type) where file_type is 'document_url' or 'image_url'
     """
+    # Determine file type, defaulting to document
+    extension = os.path.splitext(file_path)[1].lower()
+    mime_type, url_type = _FILE_TYPES.get(extension, _DEFAULT_FILE_TYPE)
+    
+    prefix = f"data:{mime_type};base64,".encode('ascii')
+    file_size = os.path.getsize(file_path)
+    buffer = bytearray(len(prefix) + 4 * ((file_size + 2) // 3))
+    buffer[:len(prefix)] = prefix
+    offset = len(prefix)
+    
     with open(file_path, "rb") as f:
-        file_bytes = f.read()
-        base64_encoded = base64.b64encode(file_bytes).decode('utf-8')
-    
-    # Determine file type and construct data URL
-    if file_path.lower().endswith('.pdf'):
-        data_url = f"data:application/pdf;base64,{base64_encoded}"
-        url_type = "document_url"
-    elif file_path.lower().endswith(('.jpg', '.jpeg')):
-        data_url = f"data:image/jpeg;base64,{base64_encoded}"
-        url_type = "image_url"
-    elif file_path.lower().endswith('.png'):
-        data_url = f"data:image/png;base64,{base64_encoded}"
-        url_type = "image_url"
-    else:
-        # Default to document
-        data_url = f"data:application/pdf;base64,{base64_encoded}"
-        url_type = "document_url"
+        # Chunk size is a multiple of 3 so only the final chunk produces padding
+        while chunk := f.read(_BASE64_CHUNK_SIZE):
+            encoded = base64.b64encode(chunk)
+            buffer[offset:offset + len(encoded)] = encoded
+            offset += len(encoded)
+    
+    # Guard against the file changing size between getsize() and read()
+    del buffer[offset:]
     
-    return data_url, url_type
+    return buffer.decode('ascii'), url_type
+
+
+def _post_multipart(endpoint: str, headers: Mapping[str, str], file_path: str, options: dict) -> httpx.Response:
+    """
+    Send the raw file as multipart/form-data instead of a base64 data URL in a JSON body.
+    
+    This avoids the 33% base64 size overhead and the encode/decode work on both sides.
+    The request options are sent as a JSON "metadata" part.
+    
+    Args:
+        endpoint: Mistral Document AI endpoint
+        headers: Request headers carrying the authorization
+        file_path: Path to the file to upload
+        options: Request options (model, bbox settings, ...) without the document
+        
+    Returns:
+        The HTTP response
+    """
+    mime_type, _ = _FILE_TYPES.get(os.path.splitext(file_path)[1].lower(), _DEFAULT_FILE_TYPE)
+    
+    with open(file_path, "rb") as f:
+        response = _MISTRAL_CLIENT.post(
+            endpoint,
+            files={"document": (os.path.basename(file_path), f, mime_type)},
+            data={"metadata": orjson.dumps(options).decode('utf-8')},
+            headers=headers
+        )
+    
+    return response
+
+
+@functools.lru_cache(maxsize=4)
+def _get_request_templates(model_name: str, api_key: str) -> tuple[Mapping[str, Any], Mapping[str, str], Mapping[str, str]]:
+    """
+    Build the request parts that only depend on the configuration once per configuration.
+    
+    Keyed on the configured model and key, so a configuration change yields new templates.
+    The templates are read-only; copy the payload before adding per-request fields.
+    
+    Returns:
+        Tuple of (base payload, authorization headers, JSON request headers)
+    """
+    base_payload = {
+        "model": model_name,
+        "include_image_base64": False  # We don't need images back, just text
+    }
+    auth_headers = {"Authorization": f"Bearer {api_key}"}
+    json_headers = {"Content-Type": "application/json", **auth_headers}
+    return MappingProxyType(base_payload), MappingProxyType(auth_headers), MappingProxyType(json_headers)
+
+
+def _send_with_retry(send: Callable[[], httpx.Response]) -> httpx.Response:
+    """
+    Call send() and retry while the endpoint responds with HTTP 429 (Too Many Requests).
+    
+    Args:
+        send: Function issuing the request; called again for every retry
+        
+    Returns:
+        The first non-throttled response (or the last one once retries are exhausted)
+    """
+    for attempt in range(_MAX_THROTTLE_RETRIES + 1):
+        response = send()
+        if response.status_code != 429 or attempt == _MAX_THROTTLE_RETRIES:
+            return response
+        
+        try:
+            delay = float(response.headers.get("retry-after", ""))
+        except ValueError:
+            delay = _THROTTLE_BASE_DELAY_SECONDS * 2 ** attempt
+        delay = min(delay, _THROTTLE_MAX_DELAY_SECONDS)
+        
+        logger.warning(f"Mistral Document AI throttled the request, retrying in {delay:.1f}s "
+                       f"(attempt {attempt + 1}/{_MAX_THROTTLE_RETRIES})")
+        time.sleep(delay)
 
 
 def get_mistral_doc_ai_client(cosmos_config_container=None):
@@ -52,13 +176,14 @@ def get_mistral_doc_ai_client(cosmos_config_container=None):
         cosmos_config_container: Optional Cosmos config container (kept for compatibility)
         
     Returns:
-        Dictionary with endpoint, API key, and model name
+        Dictionary with endpoint, API key, model name and upload mode
     """
     config = get_config(cosmos_config_container)
     
     mistral_endpoint = config.get("mistral_doc_ai_endpoint")
     mistral_api_key = config.get("mistral_doc_ai_key")
     mistral_model = config.get("mistral_doc_ai_model", "mistral-document-ai-2505")
+    mistral_multipart_upload = config.get("mistral_doc_ai_multipart_upload", False)
     
     if not mistral_endpoint or not mistral_api_key:
         raise ValueError(
@@ -69,11 +194,12 @@ def get_mistral_doc_ai_client(cosmos_config_container=None):
     return {
         "endpoint": mistral_endpoint,
         "api_key": mistral_api_key,
-        "model": mistral_model
+        "model": mistral_model,
+        "multipart_upload": mistral_multipart_upload
     }
 
 
-def extract_bboxes_from_mistral_response(result: dict) -> dict:
+def extract_bboxes_from_mistral_response(result: dict, precision: Optional[int] = None) -> dict:
     """
     Extract bounding box data from Mistral Document AI response.
     
@@ -82,6 +208,7 @@ def extract_bboxes_from_mistral_response(result: dict) -> dict:
     
     Args:
         result: The raw JSON response from Mistral Document AI
+        precision: Decimal places to round polygon points to, or None for full precision
         
     Returns:
         Dictionary with normalized polygon data
@@ -92,28 +219,32 @@ def extract_bboxes_from_mistral_response(result: dict) -> dict:
     if "pages" not in result or not isinstance(result["pages"], list):
         return {"words": words, "lines": lines, "keyValuePairs": [], "paragraphs": []}
     
+    # Raw bboxes of all words and lines, normalized in one batch once collected
+    word_bboxes = []
+    line_bboxes = []
+    
     for page_idx, page in enumerate(result["pages"]):
         page_number = page_idx + 1
         
         # Extract words with bboxes if available
         if "words" in page and isinstance(page["words"], list):
             for word in page["words"]:
-                bbox = word.get("bbox", word.get("bounding_box", []))
+                word_bboxes.append(word.get("bbox", word.get("bounding_box", [])))
                 words.append({
                     "content": word.get("text", word.get("content", "")),
                     "confidence": word.get("confidence"),
                     "pageNumber": page_number,
-                    "points": normalize_mistral_bbox(bbox)
+                    "points": None
                 })
         
         # Extract lines with bboxes if available
         if "lines" in page and isinstance(page["lines"], list):
             for line in page["lines"]:
-                bbox = line.get("bbox", line.get("bounding_box", []))
+                line_bboxes.append(line.get("bbox", line.get("bounding_box", [])))
                 lines.append({
                     "content": line.get("text", line.get("content", "")),
                     "pageNumber": page_number,
-                    "points": normalize_mistral_bbox(bbox)
+                    "points": None
                 })
         
         # Some Mistral responses have blocks instead of lines
@@ -121,12 +252,16 @@ def extract_bboxes_from_mistral_response(result: dict) -> dict:
             for block in page["blocks"]:
                 bbox = block.get("bbox", block.get("bounding_box", []))
                 if bbox:
+                    line_bboxes.append(bbox)
                     lines.append({
                         "content": block.get("text", block.get("content", "")),
                         "pageNumber": page_number,
-                        "points": normalize_mistral_bbox(bbox)
+                        "points": None
                     })
     
+    for entry, points in zip(words + lines, normalize_mistral_bboxes(word_bboxes + line_bboxes, precision)):
+        entry["points"] = points
+    
     return {
         "words": words,
         "lines": lines,
@@ -163,7 +298,51 @@ def normalize_mistral_bbox(bbox: list) -> list:
         return bbox
 
 
-def get_ocr_results(file_path: str, cosmos_config_container=None, json_schema: Optional[dict] = None, include_polygons: bool = False) -> Union[str, dict]:
+def _is_flat_numeric(bbox: list) -> bool:
+    """Check whether a bbox is a flat list of numbers (as opposed to e.g. a list of [x, y] points)"""
+    return all(isinstance(value, (int, float)) for value in bbox)
+
+
+def normalize_mistral_bboxes(bboxes: List[list], precision: Optional[int] = None) -> List[list]:
+    """
+    Normalize a batch of Mistral bboxes to ARGUS polygon format.
+    
+    Same result as calling normalize_mistral_bbox on each bbox, but all numeric
+    [x, y, width, height] boxes are expanded to their corner points in a single vectorized
+    NumPy operation. Boxes in any other shape (e.g. four [x, y] points) go through
+    normalize_mistral_bbox unchanged.
+    
+    Args:
+        bboxes: Bounding boxes from Mistral
+        precision: Decimal places to round polygon points to, or None for full precision
+        
+    Returns:
+        List of normalized polygons, in the same order as the input
+    """
+    rect_indices = [i for i, bbox in enumerate(bboxes) if bbox and len(bbox) == 4 and _is_flat_numeric(bbox)]
+    rects = set(rect_indices)
+    normalized = [bbox if i in rects else normalize_mistral_bbox(bbox) for i, bbox in enumerate(bboxes)]
+    
+    if rect_indices:
+        x, y, w, h = np.asarray([bboxes[i] for i in rect_indices]).T
+        corners = np.stack([x, y, x + w, y, x + w, y + h, x, y + h], axis=1)
+        if precision is not None:
+            corners = corners.round(precision)
+        for i, points in zip(rect_indices, corners.tolist()):
+            normalized[i] = points
+    
+    if precision is not None:
+        # Round boxes that already came as 8-point polygons
+        polygon_indices = [i for i, bbox in enumerate(bboxes) if bbox and len(bbox) == 8 and _is_flat_numeric(bbox)]
+        if polygon_indices:
+            polygons = np.asarray([bboxes[i] for i in polygon_indices]).round(precision)
+            for i, points in zip(polygon_indices, polygons.tolist()):
+                normalized[i] = points
+    
+    return normalized
+
+
+def get_ocr_results(file_path: str, cosmos_config_container=None, json_schema: Optional[dict] = None, include_polygons: bool = False, precision: Optional[int] = DEFAULT_POLYGON_PRECISION) -> Union[str, dict]:
     """
     Extract text from document using Mistral Document AI.
     
@@ -175,6 +354,7 @@ def get_ocr_results(file_path: str, cosmos_config_container=None, json_schema: O
         cosmos_config_container: Optional Cosmos config container (kept for compatibility)
         json_schema: Optional JSON schema for structured extraction with bbox annotation
         include_polygons: If True, return full result with polygon data; if False, return only text content
+        precision: Decimal places to round polygon points to, or None for full precision
         
     Returns:
         If include_polygons is False: str - OCR text content
@@ -192,19 +372,9 @@ def get_ocr_results(file_path: str, cosmos_config_container=None, json_schema: O
     api_key = mistral_config["api_key"]
     model_name = mistral_config["model"]
     
-    # Encode file to base64
-    logger.info(f"[Thread-{thread_id}] Encoding file to base64")
-    data_url, url_type = encode_file_to_base64(file_path)
-    
-    # Prepare request payload
-    payload = {
-        "model": model_name,
-        "document": {
-            "type": url_type,
-            url_type: data_url
-        },
-        "include_image_base64": False  # We don't need images back, just text
-    }
+    # Prepare request options; the document itself is attached when the request is sent
+    base_payload, auth_headers, json_headers = _get_request_templates(model_name, api_key)
+    payload = dict(base_payload)
     
     # If JSON schema is provided or include_polygons is True, add bbox annotation format
     if json_schema or include_polygons:
@@ -222,63 +392,85 @@ def get_ocr_results(file_path: str, cosmos_config_container=None, json_schema: O
             # Request bboxes without schema constraint
             payload["include_bboxes"] = True
     
-    # Make request to Mistral API
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}"
-    }
-    
     logger.info(f"[Thread-{thread_id}] Submitting document to Mistral Document AI API")
     
     try:
-        with httpx.Client(timeout=300.0) as client:  # 5 minute timeout for large documents
-            response = client.post(endpoint, json=payload, headers=headers)
-            response.raise_for_status()
-            
-            result = response.json()
-            logger.info(f"[Thread-{thread_id}] Mistral Document AI response received")
-            
-            # Extract markdown content from response
-            # Mistral Document AI returns pages with markdown content
-            ocr_text = ""
-            
-            if "pages" in result and isinstance(result["pages"], list):
-                # Concatenate markdown from all pages
-                markdown_parts = []
-                for page in result["pages"]:
-                    if isinstance(page, dict) and "markdown" in page:
-                        markdown_parts.append(page["markdown"])
-                ocr_text = "\n\n".join(markdown_parts)
-                logger.info(f"[Thread-{thread_id}] Extracted markdown from {len(result['pages'])} page(s)")
-            elif "content" in result:
-                ocr_text = result["content"]
-            elif "text" in result:
-                ocr_text = result["text"]
-            elif "choices" in result and len(result["choices"]) > 0:
-                # OpenAI-style response format
-                ocr_text = result["choices"][0].get("message", {}).get("content", "")
-            else:
-                # Fallback: log warning
-                logger.warning(f"[Thread-{thread_id}] Unexpected response format, no markdown content found")
-                ocr_text = ""
+        response = None
+        multipart_ambiguous = False
+        if mistral_config["multipart_upload"] and endpoint not in _MULTIPART_REJECTED_ENDPOINTS:
+            logger.info(f"[Thread-{thread_id}] Uploading raw file as multipart/form-data")
+            response = _send_with_retry(lambda: _post_multipart(endpoint, auth_headers, file_path, payload))
             
-            logger.info(f"[Thread-{thread_id}] Mistral Document AI OCR completed, {len(ocr_text)} characters")
-            
-            if not include_polygons:
-                return ocr_text
-            
-            # Extract polygon data from Mistral response
-            logger.info(f"[Thread-{thread_id}] Extracting polygon data from Mistral response")
-            polygon_data = extract_bboxes_from_mistral_response(result)
-            
-            return {
-                "content": ocr_text,
-                "words": polygon_data["words"],
-                "lines": polygon_data["lines"],
-                "keyValuePairs": polygon_data["keyValuePairs"],
-                "paragraphs": polygon_data["paragraphs"]
+            if response.status_code in _MULTIPART_UNSUPPORTED_STATUS_CODES:
+                logger.warning(f"[Thread-{thread_id}] Mistral endpoint rejected multipart upload ({response.status_code}), "
+                               f"falling back to base64 JSON for {endpoint}")
+                _MULTIPART_REJECTED_ENDPOINTS.add(endpoint)
+                response = None
+            elif response.status_code in _MULTIPART_AMBIGUOUS_STATUS_CODES:
+                logger.warning(f"[Thread-{thread_id}] Mistral endpoint rejected multipart upload ({response.status_code}), "
+                               f"retrying this document as base64 JSON")
+                multipart_ambiguous = True
+                response = None
+        
+        if response is None:
+            # Encode file to base64
+            logger.info(f"[Thread-{thread_id}] Encoding file to base64")
+            data_url, url_type = encode_file_to_base64(file_path)
+            payload["document"] = {
+                "type": url_type,
+                url_type: data_url
             }
             
+            # Serialize with orjson straight to bytes; the payload carries the whole base64 document
+            body = orjson.dumps(payload)
+            response = _send_with_retry(lambda: _MISTRAL_CLIENT.post(endpoint, content=body, headers=json_headers))
+            
+            if multipart_ambiguous and response.is_success:
+                # The same document went through as base64, so the endpoint rejects multipart itself
+                logger.warning(f"Falling back to base64 JSON for {endpoint}")
+                _MULTIPART_REJECTED_ENDPOINTS.add(endpoint)
+        
+        response.raise_for_status()
+        
+        result = orjson.loads(response.content)
+        logger.info(f"[Thread-{thread_id}] Mistral Document AI response received")
+        
+        # Extract markdown content from response
+        # Mistral Document AI returns pages with markdown content
+        pages = result.get("pages")
+        if pages:
+            # Concatenate markdown from all pages
+            ocr_text = "\n\n".join(page["markdown"] for page in pages if "markdown" in page)
+            logger.info(f"[Thread-{thread_id}] Extracted markdown from {len(pages)} page(s)")
+        elif (content := result.get("content")) is not None:
+            ocr_text = content
+        elif (text := result.get("text")) is not None:
+            ocr_text = text
+        elif choices := result.get("choices"):
+            # OpenAI-style response format
+            ocr_text = choices[0].get("message", {}).get("content", "")
+        else:
+            # Fallback: log warning
+            logger.warning(f"[Thread-{thread_id}] Unexpected response format, no markdown content found")
+            ocr_text = ""
+        
+        logger.info(f"[Thread-{thread_id}] Mistral Document AI OCR completed, {len(ocr_text)} characters")
+        
+        if not include_polygons:
+            return ocr_text
+        
+        # Extract polygon data from Mistral response
+        logger.info(f"[Thread-{thread_id}] Extracting polygon data from Mistral response")
+        polygon_data = extract_bboxes_from_mistral_response(result, precision)
+        
+        return {
+            "content": ocr_text,
+            "words": polygon_data["words"],
+            "lines": polygon_data["lines"],
+            "keyValuePairs": polygon_data["keyValuePairs"],
+            "paragraphs": polygon_data["paragraphs"]
+        }
+        
     except httpx.HTTPStatusError as e:
         logger.error(f"[Thread-{thread_id}] Mistral API HTTP error: {e.response.status_code}")
         logger.error(f"[Thread-{thread_id}] Response: {e.response.text}")
@@ -6,11 +6,20 @@ It uses a hybrid approach:
 1. First pass: Match against Document Intelligence key-value pairs by key name similarity
 2. Second pass: Fuzzy string match remaining values against words/lines (90% threshold)
 
+Boolean and 0/1 flag values are not correlated, and values shorter than three characters
+only match words with exactly the same text.
+
 All matching occurrences are returned as an array to handle repeated values.
 """
 
+import functools
 import logging
-from typing import Dict, Any, List, Optional, Union
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+import numpy as np
 from rapidfuzz import fuzz, process
 
 logger = logging.getLogger(__name__)
@@ -18,19 +27,411 @@ logger = logging.getLogger(__name__)
 # Default fuzzy matching threshold (90%)
 DEFAULT_FUZZY_THRESHOLD = 90.0
 
+# Length of the character n-grams used to prefilter fuzzy match candidates
+NGRAM_SIZE = 3
+
+# Separator used to join texts for substring scans (values containing it are checked text by text)
+_TEXT_SEPARATOR = '\x00'
+
+# Minimum number of string comparisons in one scoring call before it is parallelized
+PARALLEL_SCORING_MIN_PAIRS = 50_000
+
+# Values shorter than this are only matched to words with exactly the same text, as the
+# fuzzy ratio of one or two characters is mostly noise
+MIN_FUZZY_VALUE_LENGTH = 3
+
+
+def _ngrams(text: str) -> List[str]:
+    """Return the overlapping character n-grams of a text."""
+    return [text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)]
 
+
+def _is_flag_value(value: Any) -> bool:
+    """Check whether a value is a boolean or 0/1 flag, which cannot be located meaningfully in the text."""
+    return isinstance(value, bool) or (isinstance(value, (int, float)) and value in (0, 1))
+
+
+def _score_ratio(queries: List[str], choices: List[str], threshold: float) -> np.ndarray:
+    """
+    Score every query against every choice with fuzz.ratio in a single batched call.
+    
+    Large batches are spread over all cores (rapidfuzz releases the GIL); small ones stay
+    on the calling thread, where starting the worker threads would cost more than the
+    comparisons themselves.
+    """
+    return process.cdist(
+        queries, choices,
+        scorer=fuzz.ratio, processor=None, score_cutoff=threshold, dtype=np.float64,
+        workers=-1 if len(queries) * len(choices) >= PARALLEL_SCORING_MIN_PAIRS else 1
+    )
+
+
+@functools.lru_cache(maxsize=2048)
 def normalize_key(key: str) -> str:
     """
     Normalize a key string for comparison.
     Removes common variations in key naming.
+    Cached, as the same field names recur in every array row and every document.
     """
     return key.lower().replace('_', ' ').replace('-', ' ').strip()
 
 
+@dataclass(slots=True)
+class PolygonColumns:
+    """
+    Structure-of-arrays view of OCR text elements (words or lines).
+    
+    Entries are addressed by their index in the original element list, so the indices of
+    fuzzy matches select page numbers and confidences directly from the NumPy columns.
+    Fuzzy scoring runs over the distinct texts only (text_ids maps every element to its
+    entry in unique_texts), since the same words recur throughout a document.
+    """
+    texts: List[str]
+    contents: List[str]
+    points: List[List[float]]
+    pages: np.ndarray
+    confidences: np.ndarray  # NaN where no confidence is reported
+    unique_texts: List[str]
+    unique_ids: Dict[str, int]
+    text_ids: np.ndarray
+    lengths: np.ndarray  # Lengths of the unique texts
+    # Element indices grouped by unique text (CSR), to map unique text hits back to elements
+    text_offsets: np.ndarray
+    text_counts: np.ndarray
+    text_elements: np.ndarray
+    _ngram_index: Optional[Tuple[Dict[str, int], np.ndarray, np.ndarray]] = field(default=None, repr=False)
+    _joined_texts: Optional[Tuple[str, np.ndarray]] = field(default=None, repr=False)
+
+    @classmethod
+    def from_elements(cls, elements: List[Dict[str, Any]], with_confidence: bool = True) -> "PolygonColumns":
+        """Build the columns from word or line dictionaries."""
+        contents = [element.get('content', '') for element in elements]
+        confidences = [element.get('confidence') for element in elements] if with_confidence else []
+        texts = [content.lower() for content in contents]
+        unique_ids: Dict[str, int] = {}
+        text_ids = np.fromiter(
+            (unique_ids.setdefault(text, len(unique_ids)) for text in texts), dtype=np.intp, count=len(texts)
+        )
+        text_counts = np.bincount(text_ids, minlength=len(unique_ids))
+        return cls(
+            texts=texts,
+            contents=contents,
+            points=[element.get('points', []) for element in elements],
+            pages=np.fromiter((element.get('pageNumber', 1) for element in elements), dtype=np.int32, count=len(elements)),
+            confidences=np.array(
+                [np.nan if confidence is None else confidence for confidence in confidences]
+                if with_confidence else np.full(len(elements), np.nan),
+                dtype=np.float64
+            ),
+            unique_texts=list(unique_ids),
+            unique_ids=unique_ids,
+            text_ids=text_ids,
+            lengths=np.fromiter(map(len, unique_ids), dtype=np.intp, count=len(unique_ids)),
+            text_offsets=np.cumsum(text_counts) - text_counts,
+            text_counts=text_counts,
+            text_elements=np.argsort(text_ids, kind='stable')
+        )
+
+    def _build_ngram_index(self) -> None:
+        """Build the n-gram inverted index of the unique texts as CSR arrays."""
+        ngram_ids: Dict[str, int] = {}
+        ids = []
+        elements = []
+        for idx, text in enumerate(self.unique_texts):
+            for ngram in set(_ngrams(text)):
+                ids.append(ngram_ids.setdefault(ngram, len(ngram_ids)))
+                elements.append(idx)
+        
+        ids = np.array(ids, dtype=np.intp)
+        postings = np.array(elements, dtype=np.intp)[np.argsort(ids, kind='stable')]
+        offsets = np.zeros(len(ngram_ids) + 1, dtype=np.intp)
+        np.cumsum(np.bincount(ids, minlength=len(ngram_ids)), out=offsets[1:])
+        self._ngram_index = (ngram_ids, postings, offsets)
+
+    def _count_shared_ngrams(self, query: str) -> np.ndarray:
+        """Count, for every unique text, the occurrences of the query's n-grams it contains."""
+        if self._ngram_index is None:
+            self._build_ngram_index()
+        ngram_ids, postings, offsets = self._ngram_index
+        
+        slices = []
+        counts = []
+        for ngram, count in Counter(_ngrams(query)).items():
+            ngram_id = ngram_ids.get(ngram)
+            if ngram_id is not None:
+                slices.append(postings[offsets[ngram_id]:offsets[ngram_id + 1]])
+                counts.append(count)
+        
+        if not slices:
+            return np.zeros(len(self.unique_texts), dtype=np.intp)
+        return np.bincount(
+            np.concatenate(slices),
+            weights=np.repeat(counts, [len(posting) for posting in slices]),
+            minlength=len(self.unique_texts)
+        )
+
+    def containing(self, value: str) -> np.ndarray:
+        """
+        Find the unique texts that contain a value as a substring.
+        
+        The unique texts are joined with a separator once, so each lookup is a scan of a
+        single string in C; hit offsets are mapped back to their texts with a binary search.
+        
+        Returns:
+            Boolean mask over unique_texts
+        """
+        mask = np.zeros(len(self.unique_texts), dtype=bool)
+        if not value:
+            mask[:] = True
+            return mask
+        if _TEXT_SEPARATOR in value:
+            # A hit could span two texts; test them one by one instead
+            for idx, text in enumerate(self.unique_texts):
+                mask[idx] = value in text
+            return mask
+        
+        if self._joined_texts is None:
+            starts = np.cumsum(self.lengths + 1) - (self.lengths + 1)
+            self._joined_texts = (_TEXT_SEPARATOR.join(self.unique_texts), starts)
+        joined, starts = self._joined_texts
+        
+        offsets = []
+        offset = joined.find(value)
+        while offset != -1:
+            offsets.append(offset)
+            offset = joined.find(value, offset + 1)
+        
+        if offsets:
+            mask[np.searchsorted(starts, offsets, side='right') - 1] = True
+        return mask
+
+    def candidate_indices(self, queries: List[str], threshold: float) -> Optional[np.ndarray]:
+        """
+        Select the unique texts that can reach the threshold against at least one query.
+        
+        fuzz.ratio >= threshold bounds the insertions and deletions separating a query of
+        length m from a text of length n to d <= (100 - threshold) / 100 * (m + n). Texts
+        whose length differs from the query by more than d are pruned. By the q-gram lemma
+        each edit destroys at most NGRAM_SIZE of the query's n-grams, so the remaining
+        texts must also share at least m - NGRAM_SIZE + 1 - d * NGRAM_SIZE n-gram
+        occurrences with the query, counted through an inverted index of the texts.
+        
+        Returns:
+            Sorted indices into unique_texts, or None when nothing can be pruned
+        """
+        if threshold <= 0 or not self.unique_texts:
+            return None
+        
+        candidates = np.zeros(len(self.unique_texts), dtype=bool)
+        for query in queries:
+            query_length = len(query)
+            max_edits = np.floor((100 - threshold) / 100 * (query_length + self.lengths) + 1e-9)
+            possible = np.abs(self.lengths - query_length) <= max_edits
+            
+            min_shared = query_length - NGRAM_SIZE + 1 - NGRAM_SIZE * max_edits
+            if (min_shared[possible] > 0).any():
+                possible &= self._count_shared_ngrams(query) >= min_shared
+            
+            candidates |= possible
+        
+        if candidates.all():
+            return None
+        return np.flatnonzero(candidates)
+
+    def score(self, queries: List[str], threshold: float) -> np.ndarray:
+        """
+        Score the queries against all unique texts with fuzz.ratio.
+        
+        Returns:
+            (queries x unique texts) score matrix; scores below the threshold are 0
+        """
+        # Only identical strings have a ratio of 100, so exact hits are found by lookup
+        exact_ids = [self.unique_ids.get(query) for query in queries]
+        
+        if threshold >= 100:
+            scores = np.zeros((len(queries), len(self.unique_texts)), dtype=np.float64)
+            if threshold == 100:
+                for query_idx, unique_id in enumerate(exact_ids):
+                    if unique_id is not None:
+                        scores[query_idx, unique_id] = 100.0
+            return scores
+        
+        candidates = self.candidate_indices(queries, threshold)
+        if candidates is None:
+            scores = _score_ratio(queries, self.unique_texts, threshold)
+        else:
+            scores = np.zeros((len(queries), len(self.unique_texts)), dtype=np.float64)
+            # Exact hits need no edit distance computation
+            if len(queries) == 1 and exact_ids[0] is not None:
+                scores[0, exact_ids[0]] = 100.0
+                candidates = candidates[candidates != exact_ids[0]]
+            if len(candidates):
+                scores[:, candidates] = _score_ratio(
+                    queries, [self.unique_texts[idx] for idx in candidates], threshold
+                )
+        return scores
+
+    def matches_above(self, scores: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Expand the unique text scores that reach the threshold to the elements with those texts.
+        
+        Args:
+            scores: (queries x unique texts) score matrix
+            threshold: Minimum similarity threshold (0-100)
+            
+        Returns:
+            Tuple of (element indices, query indices, similarities), ordered by element and
+            then by query
+        """
+        query_indices, unique_indices = np.nonzero(scores >= threshold)
+        similarities = scores[query_indices, unique_indices]
+        
+        counts = self.text_counts[unique_indices]
+        starts = self.text_offsets[unique_indices]
+        positions = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(counts.sum())
+        element_indices = self.text_elements[positions]
+        query_indices = np.repeat(query_indices, counts)
+        similarities = np.repeat(similarities, counts)
+        
+        order = np.lexsort((query_indices, element_indices))
+        return element_indices[order], query_indices[order], similarities[order]
+
+    def to_matches(self, indices: np.ndarray, similarities: np.ndarray, sources: Union[str, List[str]]) -> List[Dict[str, Any]]:
+        """Build match dictionaries for the elements at the given indices."""
+        if isinstance(sources, str):
+            sources = [sources] * len(indices)
+        pages = self.pages[indices].tolist()
+        confidences = [None if math.isnan(confidence) else confidence for confidence in self.confidences[indices].tolist()]
+        return [
+            {
+                "points": self.points[idx],
+                "pageNumber": page,
+                "confidence": confidence,
+                "source": source,
+                "matchedContent": self.contents[idx],
+                "similarity": similarity
+            }
+            for idx, page, confidence, source, similarity in zip(
+                indices.tolist(), pages, confidences, sources, similarities.tolist()
+            )
+        ]
+
+
+@dataclass(slots=True)
+class PreparedPolygonData:
+    """
+    Normalized view of Document Intelligence polygon data.
+    
+    Built once per document so that matching a field does not re-read and re-normalize
+    every word, line and key-value pair.
+    """
+    words: PolygonColumns
+    lines: PolygonColumns
+    kv_keys: List[str] = field(default_factory=list)
+    kv_value_texts: List[str] = field(default_factory=list)
+    kv_value_contents: List[str] = field(default_factory=list)
+    kv_value_polygons: List[List[Dict[str, Any]]] = field(default_factory=list)
+    kv_confidences: List[Optional[float]] = field(default_factory=list)
+
+
+def prepare_polygon_data(polygon_data: Dict[str, Any]) -> PreparedPolygonData:
+    """
+    Build the normalized matching view of the polygon data of a document.
+    
+    Args:
+        polygon_data: Full polygon data from Document Intelligence
+        
+    Returns:
+        PreparedPolygonData with lowercased contents and normalized keys
+    """
+    prepared = PreparedPolygonData(
+        words=PolygonColumns.from_elements(polygon_data.get('words', [])),
+        # Line matches never report a confidence
+        lines=PolygonColumns.from_elements(polygon_data.get('lines', []), with_confidence=False)
+    )
+    
+    for kv_pair in polygon_data.get('keyValuePairs', []):
+        value = kv_pair.get('value', {})
+        value_content = value.get('content', '')
+        prepared.kv_keys.append(normalize_key(kv_pair.get('key', {}).get('content', '')))
+        prepared.kv_value_texts.append(value_content.lower())
+        prepared.kv_value_contents.append(value_content)
+        prepared.kv_value_polygons.append(value.get('boundingPolygons', []))
+        prepared.kv_confidences.append(kv_pair.get('confidence'))
+    
+    return prepared
+
+
+def _find_key_value_polygons(
+    fields: List[Tuple[str, Any]],
+    prepared: PreparedPolygonData,
+    threshold: float
+) -> List[List[Dict[str, Any]]]:
+    """
+    Find matching polygon(s) from Document Intelligence key-value pairs for a batch of fields.
+    
+    All field names are scored against all key-value keys, and all field values against
+    all key-value values, with one batched call each.
+    
+    Args:
+        fields: List of (field name, field value) tuples
+        prepared: Prepared polygon data of the document
+        threshold: Minimum similarity threshold for key matching
+        
+    Returns:
+        List of matching bounding polygons with metadata, in the order of the fields
+    """
+    all_matches: List[List[Dict[str, Any]]] = [[] for _ in fields]
+    if not prepared.kv_keys or not fields:
+        return all_matches
+    
+    name_rows: Dict[str, int] = {}
+    value_rows: Dict[str, int] = {}
+    field_queries = []
+    for field_name, field_value in fields:
+        normalized_field_name = normalize_key(field_name)
+        str_field_value = str(field_value).strip() if field_value else ""
+        search_value = str_field_value.lower()
+        name_rows.setdefault(normalized_field_name, len(name_rows))
+        if search_value:
+            value_rows.setdefault(search_value, len(value_rows))
+        field_queries.append((normalized_field_name, search_value))
+    
+    # Scores below the threshold are cut off early and come back as 0
+    key_scores = _score_ratio(list(name_rows), prepared.kv_keys, threshold)
+    value_scores = _score_ratio(list(value_rows), prepared.kv_value_texts, threshold) if value_rows else None
+    
+    for matches, (normalized_field_name, search_value) in zip(all_matches, field_queries):
+        key_row = key_scores[name_rows[normalized_field_name]]
+        
+        # Check which keys match
+        for idx in np.flatnonzero(key_row >= threshold).tolist():
+            # Key matches, check if value also matches (or is close enough)
+            value_similarity = (
+                float(value_scores[value_rows[search_value], idx])
+                if search_value and prepared.kv_value_texts[idx] else 0
+            )
+            
+            # If value is similar or we just want the key location
+            if value_similarity >= threshold or search_value == "":
+                for polygon in prepared.kv_value_polygons[idx]:
+                    matches.append({
+                        "points": polygon.get('points', []),
+                        "pageNumber": polygon.get('pageNumber', 1),
+                        "confidence": prepared.kv_confidences[idx],
+                        "source": "doc_intelligence_kv",
+                        "matchedContent": prepared.kv_value_contents[idx],
+                        "keySimilarity": float(key_row[idx]),
+                        "valueSimilarity": value_similarity
+                    })
+    
+    return all_matches
+
+
 def find_key_value_polygon(
     field_name: str,
     field_value: Any,
-    key_value_pairs: List[Dict[str, Any]],
+    prepared: PreparedPolygonData,
     threshold: float = DEFAULT_FUZZY_THRESHOLD
 ) -> List[Dict[str, Any]]:
     """
@@ -39,48 +440,84 @@ def find_key_value_polygon(
     Args:
         field_name: The name of the field being matched
         field_value: The value of the field
-        key_value_pairs: List of key-value pairs from Document Intelligence
+        prepared: Prepared polygon data of the document
         threshold: Minimum similarity threshold for key matching
         
     Returns:
         List of matching bounding polygons with metadata
     """
-    matches = []
-    normalized_field_name = normalize_key(field_name)
-    str_field_value = str(field_value).strip() if field_value else ""
+    return _find_key_value_polygons([(field_name, field_value)], prepared, threshold)[0]
+
+
+def _collect_fuzzy_matches(
+    search_value: str,
+    is_single_word: bool,
+    line_scores: Optional[np.ndarray],
+    word_scores: Optional[np.ndarray],
+    prepared: PreparedPolygonData,
+    threshold: float
+) -> List[Dict[str, Any]]:
+    """
+    Build the fuzzy matches of one search value from its precomputed scores.
     
-    for kv_pair in key_value_pairs:
-        key_content = kv_pair.get('key', {}).get('content', '')
-        value_content = kv_pair.get('value', {}).get('content', '')
+    Args:
+        search_value: The normalized value being searched
+        is_single_word: Whether the value consists of a single word
+        line_scores: (1 x unique lines) scores of the value, or None to skip lines
+        word_scores: (queries x unique words) scores of the value (single word) or of
+            each of its words in order, or None to skip words
+        prepared: Prepared polygon data of the document
+        threshold: Minimum similarity threshold (0-100)
         
-        # Check if key matches
-        key_similarity = fuzz.ratio(normalized_field_name, normalize_key(key_content))
+    Returns:
+        List of matching bounding polygons with metadata
+    """
+    matches = []
+    
+    # First try matching against lines (better for multi-word values)
+    if line_scores is not None:
+        lines = prepared.lines
+        line_indices, _, line_similarities = lines.matches_above(line_scores, threshold)
+        line_sources = ["fuzzy_match_line"] * len(line_indices)
         
-        if key_similarity >= threshold:
-            # Key matches, check if value also matches (or is close enough)
-            value_similarity = fuzz.ratio(str_field_value.lower(), value_content.lower()) if str_field_value and value_content else 0
+        # Also check if the value is contained within a line that did not match as a whole.
+        # Such a line always has a partial ratio of 100, so no alignment needs to be scored.
+        if threshold <= 100:
+            # NaN never reaches the threshold, not even a threshold of 0
+            partial_scores = np.where(lines.containing(search_value) & (line_scores[0] < threshold), 100.0, np.nan)
+            partial_indices, _, partial_similarities = lines.matches_above(partial_scores[np.newaxis], threshold)
             
-            # If value is similar or we just want the key location
-            if value_similarity >= threshold or str_field_value == "":
-                value_polygons = kv_pair.get('value', {}).get('boundingPolygons', [])
-                for polygon in value_polygons:
-                    matches.append({
-                        "points": polygon.get('points', []),
-                        "pageNumber": polygon.get('pageNumber', 1),
-                        "confidence": kv_pair.get('confidence'),
-                        "source": "doc_intelligence_kv",
-                        "matchedContent": value_content,
-                        "keySimilarity": key_similarity,
-                        "valueSimilarity": value_similarity
-                    })
+            if len(partial_indices):
+                line_indices = np.concatenate((line_indices, partial_indices))
+                line_similarities = np.concatenate((line_similarities, partial_similarities))
+                line_sources += ["fuzzy_match_line_partial"] * len(partial_indices)
+                
+                # Keep the matches in line order
+                order = np.argsort(line_indices, kind='stable')
+                line_indices = line_indices[order]
+                line_similarities = line_similarities[order]
+                line_sources = [line_sources[i] for i in order]
+        
+        matches.extend(lines.to_matches(line_indices, line_similarities, line_sources))
+    
+    # Also try matching against individual words. For single-word values this is a
+    # near-exact match of the whole value; for multi-word searches each search word is
+    # scored against every word. Matches are emitted word by word, in search word order
+    # within a word.
+    if word_scores is not None:
+        word_indices, _, word_similarities = prepared.words.matches_above(word_scores, threshold)
+        matches.extend(prepared.words.to_matches(
+            word_indices,
+            word_similarities,
+            "fuzzy_match_word" if is_single_word else "fuzzy_match_word_partial"
+        ))
     
     return matches
 
 
 def find_fuzzy_match_polygons(
     value: str,
-    words: List[Dict[str, Any]],
-    lines: List[Dict[str, Any]],
+    prepared: PreparedPolygonData,
     threshold: float = DEFAULT_FUZZY_THRESHOLD
 ) -> List[Dict[str, Any]]:
     """
@@ -88,78 +525,29 @@ def find_fuzzy_match_polygons(
     
     Args:
         value: The value to search for
-        words: List of words with polygons from Document Intelligence
-        lines: List of lines with polygons from Document Intelligence
+        prepared: Prepared polygon data of the document
         threshold: Minimum similarity threshold (0-100)
         
     Returns:
         List of matching bounding polygons with metadata
     """
-    matches = []
     search_value = str(value).strip().lower()
     
     if not search_value:
-        return matches
+        return []
     
-    # First try matching against lines (better for multi-word values)
-    if len(search_value.split()) > 1:
-        for line in lines:
-            line_content = line.get('content', '').lower()
-            similarity = fuzz.ratio(search_value, line_content)
-            
-            if similarity >= threshold:
-                matches.append({
-                    "points": line.get('points', []),
-                    "pageNumber": line.get('pageNumber', 1),
-                    "confidence": None,
-                    "source": "fuzzy_match_line",
-                    "matchedContent": line.get('content', ''),
-                    "similarity": similarity
-                })
-            # Also check if the value is contained within the line
-            elif search_value in line_content:
-                partial_ratio = fuzz.partial_ratio(search_value, line_content)
-                if partial_ratio >= threshold:
-                    matches.append({
-                        "points": line.get('points', []),
-                        "pageNumber": line.get('pageNumber', 1),
-                        "confidence": None,
-                        "source": "fuzzy_match_line_partial",
-                        "matchedContent": line.get('content', ''),
-                        "similarity": partial_ratio
-                    })
+    search_words = search_value.split()
+    is_single_word = len(search_words) == 1
+    line_scores = (
+        prepared.lines.score([search_value], threshold)
+        if not is_single_word and prepared.lines.texts else None
+    )
+    word_scores = (
+        prepared.words.score([search_value] if is_single_word else search_words, threshold)
+        if prepared.words.texts else None
+    )
     
-    # Also try matching against individual words
-    for word in words:
-        word_content = word.get('content', '').lower()
-        
-        # For single-word values, use exact or near-exact matching
-        if len(search_value.split()) == 1:
-            similarity = fuzz.ratio(search_value, word_content)
-            if similarity >= threshold:
-                matches.append({
-                    "points": word.get('points', []),
-                    "pageNumber": word.get('pageNumber', 1),
-                    "confidence": word.get('confidence'),
-                    "source": "fuzzy_match_word",
-                    "matchedContent": word.get('content', ''),
-                    "similarity": similarity
-                })
-        else:
-            # For multi-word searches, check if this word is part of the search
-            for search_word in search_value.split():
-                similarity = fuzz.ratio(search_word, word_content)
-                if similarity >= threshold:
-                    matches.append({
-                        "points": word.get('points', []),
-                        "pageNumber": word.get('pageNumber', 1),
-                        "confidence": word.get('confidence'),
-                        "source": "fuzzy_match_word_partial",
-                        "matchedContent": word.get('content', ''),
-                        "similarity": similarity
-                    })
-    
-    return matches
+    return _collect_fuzzy_matches(search_value, is_single_word, line_scores, word_scores, prepared, threshold)
 
 
 def deduplicate_polygons(polygons: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -167,29 +555,126 @@ def deduplicate_polygons(polygons: List[Dict[str, Any]]) -> List[Dict[str, Any]]
     Remove duplicate polygons based on points and page number.
     Keeps the match with highest confidence/similarity.
     """
-    seen = {}
+    # (points, page number) -> (kept polygon, its score)
+    seen: Dict[Tuple[tuple, Any], Tuple[Dict[str, Any], Any]] = {}
     for polygon in polygons:
         # Create a key from points and page number
-        points_key = tuple(polygon.get('points', []))
-        page_key = polygon.get('pageNumber', 1)
-        key = (points_key, page_key)
+        key = (tuple(polygon.get('points', [])), polygon.get('pageNumber', 1))
+        score = polygon.get('confidence') or polygon.get('similarity') or 0
+        
+        kept = seen.get(key)
+        # Keep the one with higher confidence/similarity
+        if kept is None or score > kept[1]:
+            seen[key] = (polygon, score)
+    
+    return [polygon for polygon, _ in seen.values()]
+
+
+def correlate_fields_with_polygons(
+    fields: List[Tuple[str, Any]],
+    polygon_data: Union[Dict[str, Any], PreparedPolygonData],
+    threshold: float = DEFAULT_FUZZY_THRESHOLD
+) -> List[List[Dict[str, Any]]]:
+    """
+    Correlate a batch of fields with their bounding polygons using hybrid approach.
+    
+    All fields are first matched against the key-value pairs together. The values of the
+    fields without a key-value match are then fuzzy matched together, with one batched
+    scoring call against the lines and one against the words. Boolean and 0/1 flag values
+    are skipped, and values shorter than MIN_FUZZY_VALUE_LENGTH only match identical words.
+    
+    Args:
+        fields: List of (field name, field value) tuples
+        polygon_data: Full polygon data from Document Intelligence, or its prepared view
+        threshold: Fuzzy matching threshold (0-100)
         
-        if key not in seen:
-            seen[key] = polygon
+    Returns:
+        List of bounding polygons where each value appears, in the order of the fields
+    """
+    if not isinstance(polygon_data, PreparedPolygonData):
+        polygon_data = prepare_polygon_data(polygon_data)
+    
+    all_matches: List[List[Dict[str, Any]]] = [[] for _ in fields]
+    fuzzy_fields = []
+    exact_fields = []
+    line_queries: Dict[str, int] = {}
+    word_queries: Dict[str, int] = {}
+    exact_queries: Dict[str, int] = {}
+    
+    # Skip None, empty and boolean/flag values
+    field_indices = [
+        idx for idx, (_, field_value) in enumerate(fields)
+        if not (
+            field_value is None
+            or (isinstance(field_value, str) and not field_value.strip())
+            or _is_flag_value(field_value)
+        )
+    ]
+    
+    # First pass: Try to match using Document Intelligence key-value pairs
+    kv_matches = _find_key_value_polygons([fields[idx] for idx in field_indices], polygon_data, threshold)
+    
+    for idx, field_kv_matches in zip(field_indices, kv_matches):
+        if field_kv_matches:
+            all_matches[idx] = field_kv_matches
+            continue
+        
+        field_value = fields[idx][1]
+        # Second pass: Fuzzy match against words/lines if no KV match found
+        search_value = str(field_value).strip().lower()
+        if not search_value:
+            continue
+        if len(search_value) < MIN_FUZZY_VALUE_LENGTH:
+            exact_queries.setdefault(search_value, len(exact_queries))
+            exact_fields.append((idx, search_value))
+            continue
+        search_words = search_value.split()
+        if len(search_words) > 1:
+            line_queries.setdefault(search_value, len(line_queries))
         else:
-            # Keep the one with higher confidence/similarity
-            existing_score = seen[key].get('confidence') or seen[key].get('similarity') or 0
-            new_score = polygon.get('confidence') or polygon.get('similarity') or 0
-            if new_score > existing_score:
-                seen[key] = polygon
+            search_words = [search_value]
+        for search_word in search_words:
+            word_queries.setdefault(search_word, len(word_queries))
+        fuzzy_fields.append((idx, search_value, search_words))
+    
+    if fuzzy_fields:
+        line_scores = (
+            polygon_data.lines.score(list(line_queries), threshold)
+            if line_queries and polygon_data.lines.texts else None
+        )
+        word_scores = (
+            polygon_data.words.score(list(word_queries), threshold)
+            if polygon_data.words.texts else None
+        )
+        
+        for idx, search_value, search_words in fuzzy_fields:
+            is_single_word = search_words == [search_value]
+            all_matches[idx] = _collect_fuzzy_matches(
+                search_value,
+                is_single_word,
+                line_scores[[line_queries[search_value]]] if line_scores is not None and not is_single_word else None,
+                word_scores[[word_queries[search_word] for search_word in search_words]] if word_scores is not None else None,
+                polygon_data,
+                threshold
+            )
+    
+    if exact_fields and polygon_data.words.texts:
+        # A threshold of 100 only accepts words with exactly the same text
+        exact_threshold = max(threshold, 100.0)
+        exact_scores = polygon_data.words.score(list(exact_queries), exact_threshold)
+        for idx, search_value in exact_fields:
+            all_matches[idx] = _collect_fuzzy_matches(
+                search_value, True, None, exact_scores[[exact_queries[search_value]]], polygon_data, exact_threshold
+            )
     
-    return list(seen.values())
+    # Deduplicate results
+    return [deduplicate_polygons(matches) for matches in all_matches]
 
 
 def correlate_field_with_polygons(
     field_name: str,
     field_value: Any,
-    polygon_data: Dict[str, Any],
+    polygon_data: Union[Dict[str, Any], PreparedPolygonData],
     threshold: float = DEFAULT_FUZZY_THRESHOLD
 ) -> List[Dict[str, Any]]:
     """
@@ -198,33 +683,13 @@ def correlate_field_with_polygons(
     Args:
         field_name: Name of the extracted field
         field_value: Value of the extracted field
-        polygon_data: Full polygon data from Document Intelligence
+        polygon_data: Full polygon data from Document Intelligence, or its prepared view
         threshold: Fuzzy matching threshold (0-100)
         
     Returns:
         List of bounding polygons where this value appears
     """
-    all_matches = []
-    
-    # Skip None or empty values
-    if field_value is None or (isinstance(field_value, str) and not field_value.strip()):
-        return all_matches
-    
-    key_value_pairs = polygon_data.get('keyValuePairs', [])
-    words = polygon_data.get('words', [])
-    lines = polygon_data.get('lines', [])
-    
-    # First pass: Try to match using Document Intelligence key-value pairs
-    kv_matches = find_key_value_polygon(field_name, field_value, key_value_pairs, threshold)
-    all_matches.extend(kv_matches)
-    
-    # Second pass: Fuzzy match against words/lines if no KV match found
-    if not kv_matches:
-        fuzzy_matches = find_fuzzy_match_polygons(str(field_value), words, lines, threshold)
-        all_matches.extend(fuzzy_matches)
-    
-    # Deduplicate results
-    return deduplicate_polygons(all_matches)
+    return correlate_fields_with_polygons([(field_name, field_value)], polygon_data, threshold)[0]
 
 
 def enrich_extraction_with_polygons(
@@ -245,70 +710,91 @@ def enrich_extraction_with_polygons(
     """
     logger.info(f"Starting polygon correlation with threshold {threshold}%")
     
-    def process_value(key: str, value: Any, parent_path: str = "") -> Dict[str, Any]:
-        """Recursively process values to add polygon data."""
-        full_key = f"{parent_path}.{key}" if parent_path else key
-        
+    # Walk the extracted data iteratively, building the output skeleton in place and
+    # collecting every primitive leaf as (field name, value, container, slot, with source)
+    enriched = {}
+    leaves = []
+    stack = []
+    
+    def place(key: str, value: Any, container: Union[Dict[str, Any], List[Any]], slot: Union[str, int]) -> None:
+        """Place a field of an object into its output container."""
         if isinstance(value, dict):
             # Nested object - process each field
-            processed = {}
-            for nested_key, nested_value in value.items():
-                processed[nested_key] = process_value(nested_key, nested_value, full_key)
-            return processed
+            container[slot] = processed = {}
+            stack.append((value, processed))
         elif isinstance(value, list):
             # Array - process each item
-            processed_items = []
+            container[slot] = processed_items = []
             for i, item in enumerate(value):
                 if isinstance(item, dict):
                     # Array of objects
-                    processed_item = {}
-                    for nested_key, nested_value in item.items():
-                        processed_item[nested_key] = process_value(nested_key, nested_value, f"{full_key}[{i}]")
-                    processed_items.append(processed_item)
+                    processed_items.append({})
+                    stack.append((item, processed_items[i]))
                 else:
                     # Array of primitives
-                    polygons = correlate_field_with_polygons(key, item, polygon_data, threshold)
-                    processed_items.append({
-                        "value": item,
-                        "boundingPolygons": [
-                            {"points": p.get('points', []), "pageNumber": p.get('pageNumber', 1)}
-                            for p in polygons
-                        ]
-                    })
-            return processed_items
+                    processed_items.append(None)
+                    leaves.append((key, item, processed_items, i, False))
         else:
             # Primitive value - find polygons
-            polygons = correlate_field_with_polygons(key, value, polygon_data, threshold)
-            
-            result = {
-                "value": value,
-                "boundingPolygons": [
-                    {"points": p.get('points', []), "pageNumber": p.get('pageNumber', 1)}
-                    for p in polygons
-                ]
-            }
-            
-            # Add source info if available
-            if polygons:
-                result["source"] = polygons[0].get('source', 'unknown')
-                if polygons[0].get('confidence'):
-                    result["confidence"] = polygons[0].get('confidence')
-            
-            return result
+            container[slot] = None
+            leaves.append((key, value, container, slot, True))
     
     # Process all top-level fields
-    enriched = {}
     for key, value in extracted_data.items():
         # Skip error/metadata fields
         if key in ['error', 'error_type', 'extraction_failed', 'raw_content', 'parsing_error']:
             enriched[key] = value
             continue
         
-        enriched[key] = process_value(key, value)
+        place(key, value, enriched, key)
+    
+    while stack:
+        value, processed = stack.pop()
+        for nested_key, nested_value in value.items():
+            place(nested_key, nested_value, processed, nested_key)
+    
+    # Correlate all leaves in one batch. Values repeated across array rows (units,
+    # currencies, ...) are matched only once; the matchers only see the normalized field
+    # name and the value's truthiness and string form. Flags are never correlated, so
+    # they all share one entry.
+    field_indices: Dict[Optional[Tuple[str, bool, str]], int] = {}
+    fields = []
+    leaf_fields = []
+    for key, value, _, _, _ in leaves:
+        cache_key = None if _is_flag_value(value) else (normalize_key(key), bool(value), str(value))
+        field_idx = field_indices.get(cache_key)
+        if field_idx is None:
+            field_idx = field_indices[cache_key] = len(fields)
+            fields.append((key, value))
+        leaf_fields.append(field_idx)
+    
+    # Normalize the document's words, lines and key-value pairs once for all fields
+    correlations = correlate_fields_with_polygons(fields, prepare_polygon_data(polygon_data), threshold)
+    
+    # Leaves with the same field and value share one boundingPolygons list, which keeps
+    # documents with many repeated values (e.g. identical SKUs on an invoice) compact
+    bounding_polygons = [
+        [{"points": p.get('points', []), "pageNumber": p.get('pageNumber', 1)} for p in polygons]
+        for polygons in correlations
+    ]
+    
+    for (_, value, container, slot, with_source), field_idx in zip(leaves, leaf_fields):
+        polygons = correlations[field_idx]
+        result = {
+            "value": value,
+            "boundingPolygons": bounding_polygons[field_idx]
+        }
+        
+        # Add source info if available
+        if with_source and polygons:
+            result["source"] = polygons[0].get('source', 'unknown')
+            if polygons[0].get('confidence'):
+                result["confidence"] = polygons[0].get('confidence')
+        
+        container[slot] = result
     
     # Add metadata about polygon correlation
-    total_fields = count_fields(enriched)
-    fields_with_polygons = count_fields_with_polygons(enriched)
+    total_fields, fields_with_polygons = count_fields_and_polygons(enriched)
     
     enriched['_polygonMetadata'] = {
         'totalFields': total_fields,
@@ -327,38 +813,42 @@ def enrich_extraction_with_polygons(
     return enriched
 
 
-def count_fields(data: Any, count: int = 0) -> int:
-    """Count total number of leaf fields in the data structure."""
-    if isinstance(data, dict):
-        for key, value in data.items():
+def count_fields_and_polygons(data: Any) -> Tuple[int, int]:
+    """
+    Count leaf fields, and the ones with at least one bounding polygon, in a single walk.
+    
+    Returns:
+        Tuple of (total fields, fields with polygons)
+    """
+    total = 0
+    with_polygons = 0
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, dict):
+            continue
+        for key, value in node.items():
             if key.startswith('_'):  # Skip metadata fields
                 continue
             if isinstance(value, dict):
                 if 'value' in value and 'boundingPolygons' in value:
-                    count += 1
+                    total += 1
+                    if value['boundingPolygons']:
+                        with_polygons += 1
                 else:
-                    count = count_fields(value, count)
+                    stack.append(value)
             elif isinstance(value, list):
-                for item in value:
-                    count = count_fields(item, count)
+                stack.extend(value)
             else:
-                count += 1
-    return count
+                total += 1
+    return total, with_polygons
+
+
+def count_fields(data: Any, count: int = 0) -> int:
+    """Count total number of leaf fields in the data structure."""
+    return count + count_fields_and_polygons(data)[0]
 
 
 def count_fields_with_polygons(data: Any, count: int = 0) -> int:
     """Count fields that have at least one bounding polygon."""
-    if isinstance(data, dict):
-        for key, value in data.items():
-            if key.startswith('_'):  # Skip metadata fields
-                continue
-            if isinstance(value, dict):
-                if 'value' in value and 'boundingPolygons' in value:
-                    if value['boundingPolygons']:
-                        count += 1
-                else:
-                    count = count_fields_with_polygons(value, count)
-            elif isinstance(value, list):
-                for item in value:
-                    count = count_fields_with_polygons(item, count)
-    return count
+    return count + count_fields_and_polygons(data)[1]
@@ -3,6 +3,7 @@ import fitz  # PyMuPDF
 from PIL import Image
 from pathlib import Path
 import io, uuid, shutil, tempfile
+from concurrent.futures import ThreadPoolExecutor
 
 from datetime import datetime
 import tempfile 
@@ -158,6 +159,7 @@ from ai_ocr.azure.openai_ops import load_image, get_size_of_base64_images
 from ai_ocr.chains import get_structured_data, get_summary_with_gpt, perform_gpt_evaluation_and_enrichment
 from ai_ocr.model import Config
 from ai_ocr.azure.images import convert_pdf_into_image
+from ai_ocr.azure.config import get_config
 from ai_ocr.polygon_matcher import enrich_extraction_with_polygons
 
 def connect_to_cosmos():
@@ -518,6 +520,53 @@ def run_ocr_processing(file_to_ocr: str, document: dict, container: any, conf_co
             update_state(document, container, 'ocr_completed', False)
         raise e
 
+def run_ocr_processing_batch(files_to_ocr: list, document: dict, include_polygons: bool = False) -> tuple[list, float]:
+    """
+    Run OCR processing on several files concurrently using the configured OCR provider.
+    
+    Each file is processed by the provider's get_ocr_results in a worker thread, with at
+    most OCR_BATCH_CONCURRENCY files in flight. The providers share their clients across
+    threads, and Document Intelligence calls also count against the process-wide
+    DOC_INTELLIGENCE_MAX_CONCURRENCY limit.
+    
+    Args:
+        files_to_ocr: Paths to the files to process
+        document: Document dictionary for error reporting
+        include_polygons: Whether to include polygon data in OCR results
+        
+    Returns:
+        Tuple of (OCR results in the order of files_to_ocr, total processing time)
+        - If include_polygons=False: each OCR result is a string
+        - If include_polygons=True: each OCR result is a dict with 'content' and polygon data
+    """
+    ocr_start_time = datetime.now()
+    try:
+        ocr_provider = os.getenv('OCR_PROVIDER', 'azure').lower()
+        
+        concurrency = get_config()["ocr_batch_concurrency"]
+        
+        logging.info(f"Using OCR provider: {ocr_provider} for {len(files_to_ocr)} files with concurrency {concurrency}, "
+                     f"include_polygons: {include_polygons}")
+        
+        if ocr_provider == 'mistral':
+            get_ocr_results = get_mistral_ocr_results
+        elif ocr_provider == 'azure':
+            get_ocr_results = get_azure_ocr_results
+        else:
+            raise ValueError(f"Unknown OCR provider: {ocr_provider}. Supported providers: 'azure', 'mistral'")
+        
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [
+                executor.submit(get_ocr_results, file_to_ocr, None, include_polygons=include_polygons)
+                for file_to_ocr in files_to_ocr
+            ]
+        ocr_results = [future.result() for future in futures]
+        
+        return ocr_results, (datetime.now() - ocr_start_time).total_seconds()
+    except Exception as e:
+        document['errors'].append(f"OCR processing error: {str(e)}")
+        raise e
+
 def run_gpt_extraction(ocr_result: str, prompt: str, json_schema: str, imgs: list, 
                       document: dict, container: any, conf_container: any = None, update_state: bool = True) -> tuple[dict, float]:
     """
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The backend imports its modules as top-level packages (ai_ocr, ...) from src/containerapp,
+# so make them importable when pytest is started from the repository root as well
+CONTAINERAPP_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if CONTAINERAPP_DIR not in sys.path:
+    sys.path.insert(0, CONTAINERAPP_DIR)
@@ -0,0 +1,284 @@
+import random
+import unittest
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from ai_ocr.polygon_matcher import (
+    PolygonColumns,
+    deduplicate_polygons,
+    enrich_extraction_with_polygons,
+)
+
+
+def _box(x, y):
+    return [x, y, x + 1.0, y, x + 1.0, y + 0.5, x, y + 0.5]
+
+
+def _word(content, page, points, confidence=0.9):
+    return {"content": content, "confidence": confidence, "pageNumber": page, "points": points}
+
+
+def _random_text(rng):
+    alphabet = "abcdeo0123., -"
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 20)))
+
+
+def _edit(rng, text):
+    """Apply a few random character edits, so queries land close to the thresholds."""
+    chars = list(text)
+    for _ in range(rng.randint(0, 3)):
+        position = rng.randint(0, len(chars))
+        operation = rng.random()
+        if operation < 0.4 and position < len(chars):
+            chars[position] = rng.choice("abcxyz09")
+        elif operation < 0.7 and position < len(chars):
+            del chars[position]
+        else:
+            chars.insert(position, rng.choice("abcxyz09"))
+    return "".join(chars) or text
+
+
+def _random_columns_and_queries(rng):
+    columns = PolygonColumns.from_elements(
+        [{"content": _random_text(rng)} for _ in range(rng.randint(1, 40))]
+    )
+    queries = [
+        _edit(rng, rng.choice(columns.unique_texts)) if rng.random() < 0.8 else _random_text(rng)
+        for _ in range(rng.randint(1, 4))
+    ]
+    return columns, queries
+
+
+POLYGON_DATA = {
+    "content": "Invoice Total 1,250.00 EUR\nContoso Ltd EUR",
+    "words": [
+        _word("Invoice", 1, _box(0, 0), 0.99),
+        _word("Total", 1, _box(1, 0), 0.98),
+        _word("1,250.00", 1, _box(2, 0), 0.97),
+        _word("EUR", 1, _box(3, 0), 0.95),
+        _word("Contoso", 2, _box(0, 1), 0.9),
+        _word("Ltd", 2, _box(1, 1), None),
+        _word("EUR", 2, _box(2, 1), 0.5),
+        # Same polygon as the "Ltd" word above, reported twice
+        _word("Ltd", 2, _box(1, 1), 0.7),
+    ],
+    "lines": [
+        {"content": "Invoice Total 1,250.00 EUR", "pageNumber": 1, "points": _box(0, 5)},
+        {"content": "Contoso Ltd EUR", "pageNumber": 2, "points": _box(0, 6)},
+    ],
+    "keyValuePairs": [
+        {
+            "key": {"content": "Invoice Number", "boundingPolygons": [{"pageNumber": 1, "points": _box(5, 5)}]},
+            "value": {"content": "INV-001", "boundingPolygons": [{"pageNumber": 1, "points": _box(6, 5)}]},
+            "confidence": 0.8,
+        }
+    ],
+    "paragraphs": [],
+}
+
+
+class TestPolygonColumnsPrefilter(unittest.TestCase):
+
+    def test_candidates_include_every_text_reaching_the_threshold(self):
+        rng = random.Random(42)
+        for _ in range(500):
+            columns, queries = _random_columns_and_queries(rng)
+            for threshold in (30.0, 50.0, 70.0, 80.0, 85.0, 90.0, 95.0):
+                expected = process.cdist(queries, columns.unique_texts, scorer=fuzz.ratio, dtype=np.float64)
+                candidates = columns.candidate_indices(queries, threshold)
+                if candidates is None:
+                    continue
+                reachable = np.flatnonzero((expected >= threshold).any(axis=0))
+                self.assertTrue(set(reachable.tolist()) <= set(candidates.tolist()), (queries, threshold))
+
+    def test_score_matches_brute_force_cdist(self):
+        rng = random.Random(7)
+        for _ in range(300):
+            columns, queries = _random_columns_and_queries(rng)
+            # Single queries take the exact lookup shortcut, so make some of them hit
+            if rng.random() < 0.5:
+                queries = [rng.choice(columns.unique_texts)]
+            for threshold in (0.0, 50.0, 70.0, 90.0, 100.0):
+                expected = process.cdist(
+                    queries, columns.unique_texts,
+                    scorer=fuzz.ratio, processor=None, score_cutoff=threshold, dtype=np.float64
+                )
+                np.testing.assert_array_equal(columns.score(queries, threshold), expected)
+
+    def test_containing_finds_substrings_of_unique_texts(self):
+        columns = PolygonColumns.from_elements(
+            [{"content": text} for text in ["Contoso Ltd", "ltd", "Total EUR", "contoso ltd"]]
+        )
+        self.assertEqual(columns.containing("ltd").tolist(), [True, True, False])
+        self.assertEqual(columns.containing("o l").tolist(), [True, False, False])
+        # A hit must not span two joined texts
+        self.assertEqual(columns.containing("ltd\x00ltd").tolist(), [False, False, False])
+        self.assertEqual(columns.containing("dto").tolist(), [False, False, False])
+
+    def test_matches_above_expands_unique_texts_in_element_order(self):
+        columns = PolygonColumns.from_elements(
+            [{"content": text} for text in ["EUR", "Total", "eur", "EUR"]]
+        )
+        scores = columns.score(["eur", "total"], 90.0)
+        elements, queries, similarities = columns.matches_above(scores, 90.0)
+        self.assertEqual(elements.tolist(), [0, 1, 2, 3])
+        self.assertEqual(queries.tolist(), [0, 1, 0, 0])
+        self.assertEqual(similarities.tolist(), [100.0, 100.0, 100.0, 100.0])
+
+
+class TestDeduplicatePolygons(unittest.TestCase):
+
+    def test_keeps_first_position_and_highest_score(self):
+        polygons = [
+            {"points": [1, 2], "pageNumber": 1, "confidence": None, "similarity": 91.0, "source": "a"},
+            {"points": [3, 4], "pageNumber": 1, "confidence": 0.5, "source": "b"},
+            {"points": [1, 2], "pageNumber": 1, "confidence": None, "similarity": 95.0, "source": "c"},
+            {"points": [1, 2], "pageNumber": 2, "confidence": 0.9, "source": "d"},
+            {"points": [3, 4], "pageNumber": 1, "confidence": 0.5, "source": "e"},
+        ]
+        self.assertEqual([polygon["source"] for polygon in deduplicate_polygons(polygons)], ["c", "b", "d"])
+
+
+class TestEnrichExtractionWithPolygons(unittest.TestCase):
+
+    def setUp(self):
+        self.extraction = {
+            "invoice_number": "INV-001",
+            "vendor_name": "Contoso Ltd",
+            "currency": "EUR",
+            "items": [{"currency": "EUR"}, {"currency": "EUR"}],
+            "tags": ["Invoice", "missing"],
+            "notes": None,
+            "error": "none",
+        }
+        self.enriched = enrich_extraction_with_polygons(self.extraction, POLYGON_DATA)
+
+    def test_key_value_match(self):
+        self.assertEqual(self.enriched["invoice_number"], {
+            "value": "INV-001",
+            "boundingPolygons": [{"points": _box(6, 5), "pageNumber": 1}],
+            "source": "doc_intelligence_kv",
+            "confidence": 0.8,
+        })
+
+    def test_multi_word_value_lists_line_then_words_without_duplicates(self):
+        # The line only contains the value, the words match one by one, and the
+        # second "Ltd" word has the same polygon as the first
+        self.assertEqual(self.enriched["vendor_name"], {
+            "value": "Contoso Ltd",
+            "boundingPolygons": [
+                {"points": _box(0, 6), "pageNumber": 2},
+                {"points": _box(0, 1), "pageNumber": 2},
+                {"points": _box(1, 1), "pageNumber": 2},
+            ],
+            "source": "fuzzy_match_line_partial",
+        })
+
+    def test_repeated_value_lists_every_occurrence_in_document_order(self):
+        expected = {
+            "value": "EUR",
+            "boundingPolygons": [
+                {"points": _box(3, 0), "pageNumber": 1},
+                {"points": _box(2, 1), "pageNumber": 2},
+            ],
+            "source": "fuzzy_match_word",
+            "confidence": 0.95,
+        }
+        self.assertEqual(self.enriched["currency"], expected)
+        self.assertEqual(self.enriched["items"], [{"currency": expected}, {"currency": expected}])
+
+    def test_array_of_primitives_has_no_source(self):
+        self.assertEqual(self.enriched["tags"], [
+            {"value": "Invoice", "boundingPolygons": [{"points": _box(0, 0), "pageNumber": 1}]},
+            {"value": "missing", "boundingPolygons": []},
+        ])
+
+    def test_empty_and_error_fields(self):
+        self.assertEqual(self.enriched["notes"], {"value": None, "boundingPolygons": []})
+        self.assertEqual(self.enriched["error"], "none")
+
+    def test_output_keeps_field_order(self):
+        self.assertEqual(list(self.enriched), list(self.extraction) + ["_polygonMetadata"])
+
+    def test_polygon_metadata(self):
+        self.assertEqual(self.enriched["_polygonMetadata"], {
+            "totalFields": 10,
+            "fieldsWithPolygons": 5,
+            "correlationThreshold": 90.0,
+            "sourceDataAvailable": {"words": 8, "lines": 2, "keyValuePairs": 1, "paragraphs": 0},
+        })
+
+
+
+class TestFlagAndShortValues(unittest.TestCase):
+
+    def setUp(self):
+        self.polygon_data = {
+            "content": "0 1 2 A A1 AB ABC",
+            "words": [
+                _word("0", 1, _box(0, 0)),
+                _word("1", 1, _box(1, 0)),
+                _word("2", 1, _box(2, 0)),
+                _word("A", 1, _box(3, 0)),
+                _word("A1", 1, _box(4, 0)),
+                _word("AB", 1, _box(5, 0)),
+                _word("ABC", 1, _box(6, 0)),
+            ],
+            "lines": [{"content": "0 1 2 A A1 AB ABC", "pageNumber": 1, "points": _box(0, 5)}],
+            "keyValuePairs": [
+                {
+                    "key": {"content": "Count", "boundingPolygons": []},
+                    "value": {"content": "0", "boundingPolygons": [{"pageNumber": 1, "points": _box(0, 6)}]},
+                    "confidence": 0.8,
+                },
+                {
+                    "key": {"content": "Paid", "boundingPolygons": []},
+                    "value": {"content": "1", "boundingPolygons": [{"pageNumber": 1, "points": _box(1, 6)}]},
+                    "confidence": 0.8,
+                },
+            ],
+            "paragraphs": [],
+        }
+
+    def test_flag_values_get_no_polygons(self):
+        # Not even from the key-value pass, although the field names match a key
+        extraction = {"count": 0, "paid": True, "Count": 0.0, "Paid": 1.0, "flag": 1, "unpaid": False}
+        enriched = enrich_extraction_with_polygons(extraction, self.polygon_data)
+        for key, value in extraction.items():
+            self.assertEqual(enriched[key], {"value": value, "boundingPolygons": []}, key)
+
+    def test_flag_strings_and_other_numbers_are_correlated(self):
+        enriched = enrich_extraction_with_polygons({"count": "0", "digit": "1", "quantity": 2}, self.polygon_data)
+        self.assertEqual(enriched["count"], {
+            "value": "0",
+            "boundingPolygons": [{"points": _box(0, 6), "pageNumber": 1}],
+            "source": "doc_intelligence_kv",
+            "confidence": 0.8,
+        })
+        self.assertEqual(enriched["digit"], {
+            "value": "1",
+            "boundingPolygons": [{"points": _box(1, 0), "pageNumber": 1}],
+            "source": "fuzzy_match_word",
+            "confidence": 0.9,
+        })
+        self.assertEqual(enriched["quantity"]["boundingPolygons"], [{"points": _box(2, 0), "pageNumber": 1}])
+
+    def test_short_values_only_match_identical_words(self):
+        # At this threshold "a1" would fuzzy match "A" and "AB", and "ab" would match "ABC"
+        enriched = enrich_extraction_with_polygons({"code": "a1", "prefix": "AB", "unit": "zz"}, self.polygon_data, 50.0)
+        self.assertEqual(enriched["code"]["boundingPolygons"], [{"points": _box(4, 0), "pageNumber": 1}])
+        self.assertEqual(enriched["prefix"]["boundingPolygons"], [{"points": _box(5, 0), "pageNumber": 1}])
+        self.assertEqual(enriched["unit"], {"value": "zz", "boundingPolygons": []})
+
+    def test_short_values_stay_exact_at_threshold_zero(self):
+        # Without key-value pairs, which every field would match at this threshold
+        polygon_data = dict(self.polygon_data, keyValuePairs=[])
+        enriched = enrich_extraction_with_polygons({"unit": "zz", "code": "A"}, polygon_data, 0.0)
+        self.assertEqual(enriched["unit"]["boundingPolygons"], [])
+        self.assertEqual(enriched["code"]["boundingPolygons"], [{"points": _box(3, 0), "pageNumber": 1}])
+        self.assertEqual(enriched["code"]["source"], "fuzzy_match_word")
+
+
+if __name__ == "__main__":
+    unittest.main()
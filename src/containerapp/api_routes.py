@@ -25,7 +25,7 @@ from dependencies import (
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'functionapp'))
 from ai_ocr.process import connect_to_cosmos, fetch_model_prompt_and_schema
-from ai_ocr.azure.config import get_config
+from ai_ocr.azure.config import get_config, invalidate_config_cache
 
 logger = logging.getLogger(__name__)
 
@@ -435,6 +435,7 @@ async def update_openai_settings(request: Request):
             os.environ["MISTRAL_DOC_AI_KEY"] = data["mistral_key"]
         if "mistral_model" in data:
             os.environ["MISTRAL_DOC_AI_MODEL"] = data["mistral_model"]
+        invalidate_config_cache()
         
         # Return success response with updated config (hide keys)
         updated_config = {
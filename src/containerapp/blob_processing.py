@@ -21,7 +21,7 @@ from dependencies import (
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'functionapp'))
 from ai_ocr.process import (
-    run_ocr_processing, run_gpt_extraction, run_gpt_evaluation, run_gpt_summary,
+    run_ocr_processing, run_ocr_processing_batch, run_gpt_extraction, run_gpt_evaluation, run_gpt_summary,
     prepare_images, initialize_document, update_state, 
     write_blob_to_temp_file, fetch_model_prompt_and_schema, 
     split_pdf_into_subsets, run_polygon_enrichment
@@ -345,13 +345,19 @@ def process_blob(blob_input_stream: BlobInputStream, data_container):
         
         if processing_options.get('include_ocr', True):
             logger.info(f"Starting OCR processing for {len(file_paths)} chunks (include_polygons={include_polygons})")
-            for i, file_path in enumerate(file_paths):
-                logger.info(f"Processing OCR for chunk {i+1}/{len(file_paths)}")
-                ocr_result, ocr_time = run_ocr_processing(
-                    file_path, document, data_container, None, 
+            if len(file_paths) > 1:
+                # OCR all chunks concurrently; per-chunk latency is dominated by the OCR service
+                chunk_ocr_results, total_ocr_time = run_ocr_processing_batch(
+                    file_paths, document, include_polygons=include_polygons
+                )
+            else:
+                ocr_result, total_ocr_time = run_ocr_processing(
+                    file_paths[0], document, data_container, None, 
                     update_state=False, include_polygons=include_polygons
                 )
-                
+                chunk_ocr_results = [ocr_result]
+            
+            for ocr_result in chunk_ocr_results:
                 # Handle polygon data if enabled
                 if include_polygons and isinstance(ocr_result, dict):
                     ocr_results.append(ocr_result.get('content', ''))
@@ -364,8 +370,6 @@ def process_blob(blob_input_stream: BlobInputStream, data_container):
                 else:
                     ocr_results.append(ocr_result)
                     ocr_polygon_data_list.append({})
-                    
-                total_ocr_time += ocr_time
                 
             processing_times['ocr_processing_time'] = total_ocr_time
             document['extracted_data']['ocr_output'] = '\n'.join(str(result) for result in ocr_results)